@@ -0,0 +1,37 @@
+"""add alert list ordering indexes, replacing single-column ones
+
+Revision ID: d6e4f5a7b8c9
+Revises: c5d3e4f6a7b8
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "d6e4f5a7b8c9"
+down_revision: Union[str, None] = "c5d3e4f6a7b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_ORDER = [sa.text("score DESC"), sa.text("created_at DESC")]
+
+
+def upgrade() -> None:
+    op.create_index("ix_alerts_score_created", "alerts", _ORDER)
+    op.create_index("ix_alerts_hunt_score_created", "alerts", ["hunt_id", *_ORDER])
+    op.create_index("ix_alerts_dataset_score_created", "alerts", ["dataset_id", *_ORDER])
+    op.create_index("ix_alerts_status_score_created", "alerts", ["status", *_ORDER])
+    # Superseded by the composites above, which lead with the same column
+    op.drop_index("ix_alerts_status", table_name="alerts")
+    op.drop_index("ix_alerts_hunt", table_name="alerts")
+    op.drop_index("ix_alerts_dataset", table_name="alerts")
+
+
+def downgrade() -> None:
+    op.create_index("ix_alerts_dataset", "alerts", ["dataset_id"])
+    op.create_index("ix_alerts_hunt", "alerts", ["hunt_id"])
+    op.create_index("ix_alerts_status", "alerts", ["status"])
+    op.drop_index("ix_alerts_status_score_created", table_name="alerts")
+    op.drop_index("ix_alerts_dataset_score_created", table_name="alerts")
+    op.drop_index("ix_alerts_hunt_score_created", table_name="alerts")
+    op.drop_index("ix_alerts_score_created", table_name="alerts")
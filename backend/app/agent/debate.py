@@ -1,12 +1,39 @@
 ﻿import asyncio
+import hashlib
+
+from app.services.cache import LRUCache
+
+# Final judge answers keyed by (model, prompt digest). Analysts often re-run
+# the same query; a hit skips all four LLM round-trips.
+_CACHE_MAXSIZE = 256
+_CACHE_TTL_SECONDS = 600.0
+_cache = LRUCache(maxsize=_CACHE_MAXSIZE, ttl=_CACHE_TTL_SECONDS)
+
+
+def _cache_key(provider, prompt: str) -> tuple[str, bytes]:
+    model = getattr(provider, "model", None) or getattr(provider, "model_name", "")
+    digest = hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+    return f"{type(provider).__name__}:{model}", digest
+
+
+def clear_cache() -> None:
+    _cache.clear()
+
 
 async def debated_generate(provider, prompt: str) -> str:
     """
     Minimal behind-the-scenes debate.
     Same logic for all apps.
     Advisory only. No execution.
+    Identical prompts to the same model are answered from a
+    bounded in-memory cache for ten minutes.
     """
 
+    key = _cache_key(provider, prompt)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+
     planner = f"""
 You are the Planner.
 Give structured advisory guidance only.
@@ -64,4 +91,5 @@ Pragmatist:
 """
 
     final = await provider.generate(judge)
+    _cache.put(key, final)
     return final
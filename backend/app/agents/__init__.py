@@ -4,8 +4,20 @@ Provides read-only guidance on CSV artifact data, analytical pivots, and hypothe
 Agents are advisory only and do not execute actions or modify data.
 """
 
-from .core_v2 import ThreatHuntAgent, AgentContext, AgentResponse, Perspective
-from .providers_v2 import OllamaProvider, OpenWebUIProvider, EmbeddingProvider
+from importlib import import_module
+
+# Public names are resolved on first access (PEP 562) so that importing a
+# lightweight submodule such as ``app.agents.registry`` does not drag in the
+# agent core, the SANS RAG service and the HTTP provider stack.
+_LAZY_EXPORTS = {
+    "ThreatHuntAgent": ".core_v2",
+    "AgentContext": ".core_v2",
+    "AgentResponse": ".core_v2",
+    "Perspective": ".core_v2",
+    "OllamaProvider": ".providers_v2",
+    "OpenWebUIProvider": ".providers_v2",
+    "EmbeddingProvider": ".providers_v2",
+}
 
 __all__ = [
     "ThreatHuntAgent",
@@ -16,3 +28,16 @@ __all__ = [
     "OpenWebUIProvider",
     "EmbeddingProvider",
 ]
+
+
+def __getattr__(name: str):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -5,18 +5,21 @@ real LLM providers (Ollama/OpenWebUI), and structured response parsing.
 Integrates SANS RAG context from Open WebUI.
 """
 
-import json
+import asyncio
+import hashlib
 import logging
-import re
+import math
 import time
-from typing import AsyncIterator, Optional
+from array import array
+from typing import AsyncIterator, Iterator, Optional
 
-from pydantic import BaseModel, Field
+import orjson
+from pydantic import BaseModel, Field, field_validator
 
 from app.config import settings
 from app.services.sans_rag import sans_rag
 from .router import TaskRouter, TaskType, RoutingDecision, task_router
-from .providers_v2 import OllamaProvider, OpenWebUIProvider
+from .providers_v2 import OllamaProvider, OpenWebUIProvider, EmbeddingProvider
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +50,17 @@ class AgentContext(BaseModel):
     mode: str = Field(default="quick", description="quick | deep | debate")
     model_override: Optional[str] = Field(None, description="Force a specific model")
 
+    @field_validator("conversation_history")
+    @classmethod
+    def _trim_history(cls, v: Optional[list[dict]]) -> list[dict]:
+        """Keep only the turns the prompt uses, each capped at 500 chars."""
+        if not v:
+            return []
+        return [
+            {**msg, "content": (msg.get("content") or "")[:500]}
+            for msg in v[-settings.AGENT_HISTORY_LENGTH:]
+        ]
+
 
 class Perspective(BaseModel):
     """A single perspective from the debate agent."""
@@ -108,6 +122,176 @@ RESPONSE FORMAT — you MUST respond with valid JSON:
 
 Respond ONLY with the JSON object. No markdown, no code fences, no extra text."""
 
+# Shared by every debate perspective; the role is given at the end of the
+# prompt so all perspectives share the same cacheable prefix.
+DEBATE_SYSTEM_PROMPT = (
+    "You are one member of a threat hunting debate panel. "
+    "Take the role assigned at the end of the prompt. "
+    "Provide analysis only. No execution."
+)
+
+# Debate perspectives, in presentation order: (task type, role, instructions).
+_DEBATE_ROLES: tuple[tuple[TaskType, str, str], ...] = (
+    (
+        TaskType.DEBATE_PLANNER,
+        "Planner",
+        "You are the Planner for a threat hunting investigation.\n"
+        "Provide a structured investigation strategy. Reference SANS methodologies.\n"
+        "Focus on: investigation steps, data sources to examine, MITRE ATT&CK mapping.\n"
+        "Be specific to the data context provided.",
+    ),
+    (
+        TaskType.DEBATE_CRITIC,
+        "Critic",
+        "You are the Critic for a threat hunting investigation.\n"
+        "Identify risks, false positive scenarios, missing evidence, and assumptions.\n"
+        "Reference SANS training on common analyst mistakes.\n"
+        "Challenge the obvious interpretation.",
+    ),
+    (
+        TaskType.DEBATE_PRAGMATIST,
+        "Pragmatist",
+        "You are the Pragmatist for a threat hunting investigation.\n"
+        "Suggest the most actionable, efficient next steps.\n"
+        "Reference SANS incident response playbooks.\n"
+        "Focus on: quick wins, triage priorities, what to escalate.",
+    ),
+)
+
+_JUDGE_SYSTEM_PROMPT = (
+    "You are the Judge. Merge perspectives into a final advisory answer. "
+    "Respond with JSON only."
+)
+
+_JUDGE_HEADER = (
+    "You are the Judge. Merge these three threat hunting perspectives into "
+    "ONE final advisory answer.\n\n"
+    "Rules:\n"
+    "- Advisory only — no execution\n"
+    "- Clearly list risks and assumptions\n"
+    "- Highlight where perspectives agree and disagree\n"
+    "- Provide a unified recommendation\n"
+    "- Reference SANS methodologies where relevant\n\n"
+)
+
+_JUDGE_FOOTER = (
+    "Respond with the merged analysis in this JSON format:\n"
+    '{"guidance": "...", "confidence": 0.85, "suggested_pivots": [...], '
+    '"suggested_filters": [...], "caveats": "...", "reasoning": "...", '
+    '"sans_references": [...]}'
+)
+
+# Optional context fields rendered into the prompt, in order: (attribute, label).
+_PROMPT_FIELDS: tuple[tuple[str, str], ...] = (
+    ("dataset_name", "Dataset"),
+    ("artifact_type", "Artifact type"),
+    ("host_identifier", "Host"),
+    ("data_summary", "Data summary"),
+    ("active_hypotheses", "Active hypotheses"),
+    ("annotations_summary", "Analyst annotations"),
+    ("enrichment_summary", "Enrichment data"),
+)
+
+
+# ── Semantic RAG cache ────────────────────────────────────────────────
+
+
+class SemanticRAGCache:
+    """In-memory semantic cache for SANS RAG enrichment.
+
+    Entries are keyed by an embedding of ``(query, data_summary)``.  A lookup
+    returns the stored RAG context when the cosine similarity to a cached
+    query is at least ``threshold``, so near-duplicate analyst questions skip
+    the Open WebUI retrieval round-trip.  Vectors are stored unit-normalised
+    so similarity is a plain dot product (no numpy required), and quantised
+    to int8 with a per-vector scale, which keeps each cached embedding to one
+    byte per dimension instead of a list of Python floats.
+    """
+
+    def __init__(
+        self,
+        embedder: EmbeddingProvider | None = None,
+        threshold: float = 0.92,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600.0,
+        embed_timeout: float = 0.5,
+    ):
+        self._embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embed_timeout = embed_timeout
+        # Parallel lists (one slot per entry) keep the scan loop tight.
+        self._vectors: list[array] = []
+        self._scales: list[float] = []
+        self._texts: list[str] = []
+        self._stamps: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    async def embed(self, text: str) -> list[float] | None:
+        """Return a unit-length embedding for *text*, or None on failure."""
+        if self._embedder is None:
+            self._embedder = EmbeddingProvider()
+        try:
+            vec = await asyncio.wait_for(
+                self._embedder.embed(text), timeout=self.embed_timeout,
+            )
+        except Exception as e:
+            logger.debug(f"RAG cache embedding failed: {e}")
+            return None
+        norm = math.sqrt(sum(x * x for x in vec))
+        if not norm:
+            return None
+        return [x / norm for x in vec]
+
+    def lookup(self, vec: list[float]) -> str | None:
+        """Return the cached context most similar to *vec*, if close enough."""
+        self._evict_expired()
+        best_score = self.threshold
+        best_idx = -1
+        for i, cached in enumerate(self._vectors):
+            if len(cached) != len(vec):
+                continue
+            score = self._scales[i] * sum(a * b for a, b in zip(cached, vec))
+            if score >= best_score:
+                best_score = score
+                best_idx = i
+        return self._texts[best_idx] if best_idx >= 0 else None
+
+    def store(self, vec: list[float], text: str) -> None:
+        peak = max(map(abs, vec), default=0.0)
+        scale = peak / 127 if peak else 1.0
+        self._vectors.append(array("b", [round(x / scale) for x in vec]))
+        self._scales.append(scale)
+        self._texts.append(text)
+        self._stamps.append(time.monotonic())
+        overflow = len(self._texts) - self.max_entries
+        if overflow > 0:
+            del self._vectors[:overflow]
+            del self._scales[:overflow]
+            del self._texts[:overflow]
+            del self._stamps[:overflow]
+
+    def clear(self) -> None:
+        self._vectors.clear()
+        self._scales.clear()
+        self._texts.clear()
+        self._stamps.clear()
+
+    def _evict_expired(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        # Entries are appended in time order, so expired ones form a prefix.
+        n = 0
+        while n < len(self._stamps) and self._stamps[n] < cutoff:
+            n += 1
+        if n:
+            del self._vectors[:n]
+            del self._scales[:n]
+            del self._texts[:n]
+            del self._stamps[:n]
+
 
 # ── Agent ─────────────────────────────────────────────────────────────
 
@@ -115,13 +299,20 @@ Respond ONLY with the JSON object. No markdown, no code fences, no extra text.""
 class ThreatHuntAgent:
     """Analyst-assist agent backed by Wile + Roadrunner LLM cluster."""
 
-    def __init__(self, router: TaskRouter | None = None):
+    def __init__(
+        self,
+        router: TaskRouter | None = None,
+        rag_cache: SemanticRAGCache | None = None,
+    ):
         self.router = router or task_router
         self.system_prompt = SYSTEM_PROMPT
+        self.rag_cache = rag_cache if rag_cache is not None else SemanticRAGCache()
+        # In-flight RAG enrichments keyed by (query, data_summary) digest.
+        self._inflight: dict[str, asyncio.Future] = {}
 
     async def assist(self, context: AgentContext) -> AgentResponse:
         """Provide guidance on artifact data and analysis."""
-        start = time.monotonic()
+        start_ns = time.perf_counter_ns()
 
         if context.mode == "debate":
             return await self._debate_assist(context)
@@ -136,35 +327,18 @@ class ThreatHuntAgent:
 
         # Enrich prompt with SANS RAG context
         prompt = self._build_prompt(context)
-        try:
-            rag_context = await sans_rag.enrich_prompt(
-                context.query,
-                investigation_context=context.data_summary or "",
-            )
-            if rag_context:
-                prompt = f"{prompt}\n\n{rag_context}"
-        except Exception as e:
-            logger.warning(f"SANS RAG enrichment failed: {e}")
+        rag_context = await self._get_rag_context(context)
+        if rag_context:
+            prompt = f"{prompt}\n\n{rag_context}"
 
         # Call LLM
         provider = self.router.get_provider(decision)
-        if isinstance(provider, OpenWebUIProvider):
-            messages = [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": prompt},
-            ]
-            result = await provider.chat(
-                messages,
-                max_tokens=settings.AGENT_MAX_TOKENS,
-                temperature=settings.AGENT_TEMPERATURE,
-            )
-        else:
-            result = await provider.generate(
-                prompt,
-                system=self.system_prompt,
-                max_tokens=settings.AGENT_MAX_TOKENS,
-                temperature=settings.AGENT_TEMPERATURE,
-            )
+        result = await provider.generate(
+            prompt,
+            system=self.system_prompt,
+            max_tokens=settings.AGENT_MAX_TOKENS,
+            temperature=settings.AGENT_TEMPERATURE,
+        )
 
         raw_text = result.get("response", "")
         latency_ms = result.get("_latency_ms", 0)
@@ -175,20 +349,85 @@ class ThreatHuntAgent:
         response.node_used = decision.node.value
         response.latency_ms = latency_ms
 
-        total_ms = int((time.monotonic() - start) * 1000)
+        total_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
         logger.info(
             f"Agent assist: {context.query[:60]}... → "
-            f"{decision.model} on {decision.node.value} "
+            f"{decision.model} on {decision.node} "
             f"({total_ms}ms total, {latency_ms}ms LLM)"
         )
 
         return response
 
+    async def _get_rag_context(self, context: AgentContext) -> str:
+        """Return SANS RAG context, coalescing identical concurrent requests.
+
+        Callers asking for the same ``(query, data_summary)`` while an
+        enrichment is already running await that result instead of issuing
+        their own embedding and RAG round-trips.
+        """
+        key = hashlib.blake2b(
+            f"{context.query}\x00{context.data_summary or ''}".encode(),
+            digest_size=16,
+        ).hexdigest()
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            rag_context = await self._fetch_rag_context(context)
+            fut.set_result(rag_context)
+            return rag_context
+        finally:
+            self._inflight.pop(key, None)
+            if not fut.done():
+                fut.set_result("")
+
+    async def _fetch_rag_context(self, context: AgentContext) -> str:
+        """Return SANS RAG context, served from the semantic cache when possible.
+
+        The embedding is only awaited up front when there are cached entries
+        to match against; with an empty cache it runs alongside the
+        retrieval and is used just to store the result.
+        """
+        embed = asyncio.ensure_future(self.rag_cache.embed(
+            f"{context.query}\n{context.data_summary or ''}"
+        ))
+        if len(self.rag_cache):
+            vec = await embed
+            if vec is not None:
+                cached = self.rag_cache.lookup(vec)
+                if cached is not None:
+                    return cached
+
+        try:
+            rag_context = await sans_rag.enrich_prompt(
+                context.query,
+                investigation_context=context.data_summary or "",
+            )
+        except Exception as e:
+            embed.cancel()
+            logger.warning(f"SANS RAG enrichment failed: {e}")
+            return ""
+
+        # Bounded by embed_timeout, and usually already done by now
+        vec = await embed
+        if vec is not None and rag_context:
+            self.rag_cache.store(vec, rag_context)
+        return rag_context
+
     async def assist_stream(
         self,
         context: AgentContext,
+        chunk_window_ms: int = 50,
+        chunk_max_tokens: int = 16,
     ) -> AsyncIterator[str]:
-        """Stream agent response tokens."""
+        """Stream agent response tokens, coalesced into small chunks.
+
+        ``chunk_window_ms`` and ``chunk_max_tokens`` are handed to the
+        provider's stream coalescer; see ``OllamaProvider.generate_stream``.
+        """
         task_type = self.router.classify_task(context.query)
         decision = self.router.route(task_type, model_override=context.model_override)
         prompt = self._build_prompt(context)
@@ -200,6 +439,8 @@ class ThreatHuntAgent:
                 system=self.system_prompt,
                 max_tokens=settings.AGENT_MAX_TOKENS,
                 temperature=settings.AGENT_TEMPERATURE,
+                chunk_window_ms=chunk_window_ms,
+                chunk_max_tokens=chunk_max_tokens,
             ):
                 yield token
         elif isinstance(provider, OpenWebUIProvider):
@@ -211,61 +452,27 @@ class ThreatHuntAgent:
                 messages,
                 max_tokens=settings.AGENT_MAX_TOKENS,
                 temperature=settings.AGENT_TEMPERATURE,
+                chunk_window_ms=chunk_window_ms,
+                chunk_max_tokens=chunk_max_tokens,
             ):
                 yield token
 
     async def _debate_assist(self, context: AgentContext) -> AgentResponse:
         """Multi-perspective analysis using diverse models on Wile."""
-        import asyncio
-
-        start = time.monotonic()
+        start_ns = time.perf_counter_ns()
         prompt = self._build_prompt(context)
 
-        # Route each perspective to a different heavy model
-        roles = {
-            TaskType.DEBATE_PLANNER: (
-                "Planner",
-                "You are the Planner for a threat hunting investigation.\n"
-                "Provide a structured investigation strategy. Reference SANS methodologies.\n"
-                "Focus on: investigation steps, data sources to examine, MITRE ATT&CK mapping.\n"
-                "Be specific to the data context provided.\n\n",
-            ),
-            TaskType.DEBATE_CRITIC: (
-                "Critic",
-                "You are the Critic for a threat hunting investigation.\n"
-                "Identify risks, false positive scenarios, missing evidence, and assumptions.\n"
-                "Reference SANS training on common analyst mistakes.\n"
-                "Challenge the obvious interpretation.\n\n",
-            ),
-            TaskType.DEBATE_PRAGMATIST: (
-                "Pragmatist",
-                "You are the Pragmatist for a threat hunting investigation.\n"
-                "Suggest the most actionable, efficient next steps.\n"
-                "Reference SANS incident response playbooks.\n"
-                "Focus on: quick wins, triage priorities, what to escalate.\n\n",
-            ),
-        }
-
         async def _call_perspective(task_type: TaskType, role_name: str, prefix: str):
             decision = self.router.route(task_type)
             provider = self.router.get_provider(decision)
-            full_prompt = prefix + prompt
-
-            if isinstance(provider, OpenWebUIProvider):
-                result = await provider.generate(
-                    full_prompt,
-                    system=f"You are the {role_name}. Provide analysis only. No execution.",
-                    max_tokens=settings.AGENT_MAX_TOKENS,
-                    temperature=0.4,
-                )
-            else:
-                result = await provider.generate(
-                    full_prompt,
-                    system=f"You are the {role_name}. Provide analysis only. No execution.",
-                    max_tokens=settings.AGENT_MAX_TOKENS,
-                    temperature=0.4,
-                )
-
+            # Role instructions go last, so the three prompts differ only in
+            # their tail and share the common system prompt and evidence.
+            result = await provider.generate(
+                f"{prompt}\n\n{prefix}",
+                system=DEBATE_SYSTEM_PROMPT,
+                max_tokens=settings.AGENT_MAX_TOKENS,
+                temperature=0.4,
+            )
             return Perspective(
                 role=role_name,
                 content=result.get("response", ""),
@@ -274,58 +481,47 @@ class ThreatHuntAgent:
                 latency_ms=result.get("_latency_ms", 0),
             )
 
-        # Run perspectives in parallel
+        # Submit every perspective before awaiting any of them
         perspective_tasks = [
-            _call_perspective(tt, name, prefix)
-            for tt, (name, prefix) in roles.items()
+            asyncio.create_task(_call_perspective(tt, name, prefix))
+            for tt, name, prefix in _DEBATE_ROLES
         ]
-        perspectives = await asyncio.gather(*perspective_tasks)
-
-        # Judge merges the perspectives
-        judge_prompt = (
-            "You are the Judge. Merge these three threat hunting perspectives into "
-            "ONE final advisory answer.\n\n"
-            "Rules:\n"
-            "- Advisory only — no execution\n"
-            "- Clearly list risks and assumptions\n"
-            "- Highlight where perspectives agree and disagree\n"
-            "- Provide a unified recommendation\n"
-            "- Reference SANS methodologies where relevant\n\n"
-        )
-        for p in perspectives:
-            judge_prompt += f"=== {p.role} (via {p.model_used}) ===\n{p.content}\n\n"
-
-        judge_prompt += (
-            f"\nOriginal analyst query:\n{context.query}\n\n"
-            "Respond with the merged analysis in this JSON format:\n"
-            '{"guidance": "...", "confidence": 0.85, "suggested_pivots": [...], '
-            '"suggested_filters": [...], "caveats": "...", "reasoning": "...", '
-            '"sans_references": [...]}'
-        )
 
+        # Resolve the judge and warm its connection while perspectives run
         judge_decision = self.router.route(TaskType.DEBATE_JUDGE)
         judge_provider = self.router.get_provider(judge_decision)
+        judge_warmup = asyncio.create_task(judge_provider.is_available())
 
-        if isinstance(judge_provider, OpenWebUIProvider):
-            judge_result = await judge_provider.generate(
-                judge_prompt,
-                system="You are the Judge. Merge perspectives into a final advisory answer. Respond with JSON only.",
-                max_tokens=settings.AGENT_MAX_TOKENS,
-                temperature=0.2,
-            )
-        else:
-            judge_result = await judge_provider.generate(
-                judge_prompt,
-                system="You are the Judge. Merge perspectives into a final advisory answer. Respond with JSON only.",
-                max_tokens=settings.AGENT_MAX_TOKENS,
-                temperature=0.2,
-            )
+        try:
+            perspectives = await asyncio.gather(*perspective_tasks)
+        finally:
+            for task in (*perspective_tasks, judge_warmup):
+                if not task.done():
+                    task.cancel()
+
+        # Judge merges the perspectives; it needs the query, not the evidence
+        judge_prompt = "".join([
+            _JUDGE_HEADER,
+            *[
+                f"=== {p.role} (via {p.model_used}) ===\n{p.content}\n\n"
+                for p in perspectives
+            ],
+            f"\nOriginal analyst query:\n{context.query}\n\n",
+            _JUDGE_FOOTER,
+        ])
+
+        judge_result = await judge_provider.generate(
+            judge_prompt,
+            system=_JUDGE_SYSTEM_PROMPT,
+            max_tokens=settings.AGENT_MAX_TOKENS,
+            temperature=0.2,
+        )
 
         raw_text = judge_result.get("response", "")
         response = self._parse_response(raw_text, context)
         response.model_used = judge_decision.model
         response.node_used = judge_decision.node.value
-        response.latency_ms = int((time.monotonic() - start) * 1000)
+        response.latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
         response.perspectives = list(perspectives)
 
         return response
@@ -334,24 +530,20 @@ class ThreatHuntAgent:
         """Build the prompt with all available context."""
         parts = [f"Analyst query: {context.query}"]
 
-        if context.dataset_name:
-            parts.append(f"Dataset: {context.dataset_name}")
-        if context.artifact_type:
-            parts.append(f"Artifact type: {context.artifact_type}")
-        if context.host_identifier:
-            parts.append(f"Host: {context.host_identifier}")
-        if context.data_summary:
-            parts.append(f"Data summary: {context.data_summary}")
-        if context.active_hypotheses:
-            parts.append(f"Active hypotheses: {'; '.join(context.active_hypotheses)}")
-        if context.annotations_summary:
-            parts.append(f"Analyst annotations: {context.annotations_summary}")
-        if context.enrichment_summary:
-            parts.append(f"Enrichment data: {context.enrichment_summary}")
-        if context.conversation_history:
+        for attr, label in _PROMPT_FIELDS:
+            value = getattr(context, attr)
+            if value:
+                if isinstance(value, list):
+                    value = "; ".join(value)
+                parts.append(f"{label}: {value}")
+
+        history = context.conversation_history
+        if history:
             parts.append("\nRecent conversation:")
-            for msg in context.conversation_history[-settings.AGENT_HISTORY_LENGTH:]:
-                parts.append(f"  {msg.get('role', 'unknown')}: {msg.get('content', '')[:500]}")
+            parts.extend(
+                f"  {msg.get('role', 'unknown')}: {msg['content']}"
+                for msg in history
+            )
 
         return "\n".join(parts)
 
@@ -362,14 +554,22 @@ class ThreatHuntAgent:
         """
         parsed = self._try_parse_json(raw)
         if parsed:
-            return AgentResponse(
-                guidance=parsed.get("guidance", raw),
+            # Every field is coerced to its declared type here, so the
+            # validating constructor would only repeat the work.
+            caveats = parsed.get("caveats")
+            reasoning = parsed.get("reasoning")
+            return AgentResponse.model_construct(
+                guidance=str(parsed.get("guidance", raw)),
                 confidence=min(max(float(parsed.get("confidence", 0.7)), 0.0), 1.0),
-                suggested_pivots=parsed.get("suggested_pivots", [])[:6],
-                suggested_filters=parsed.get("suggested_filters", [])[:6],
-                caveats=parsed.get("caveats"),
-                reasoning=parsed.get("reasoning"),
-                sans_references=parsed.get("sans_references", []),
+                suggested_pivots=_str_list(parsed.get("suggested_pivots"), 6),
+                suggested_filters=_str_list(parsed.get("suggested_filters"), 6),
+                caveats=None if caveats is None else str(caveats),
+                reasoning=None if reasoning is None else str(reasoning),
+                sans_references=_str_list(parsed.get("sans_references")),
+                model_used="",
+                node_used="",
+                latency_ms=0,
+                perspectives=None,
             )
 
         # Fallback: use raw text as guidance
@@ -384,25 +584,87 @@ class ThreatHuntAgent:
         )
 
     def _try_parse_json(self, text: str) -> dict | None:
-        """Try to extract JSON from LLM output."""
-        # Direct parse
-        try:
-            return json.loads(text.strip())
-        except json.JSONDecodeError:
-            pass
-
-        # Extract from code fences
-        patterns = [
-            r"```json\s*(.*?)\s*```",
-            r"```\s*(.*?)\s*```",
-            r"\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}",
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.DOTALL)
-            if match:
-                try:
-                    return json.loads(match.group(1) if match.lastindex else match.group(0))
-                except (json.JSONDecodeError, IndexError):
-                    continue
+        """Try to extract a JSON object from LLM output.
+
+        Candidates are the whole text, the body of a code fence, and the first
+        balanced ``{...}`` block; every step is linear in the input length.
+        """
+        for candidate in _json_candidates(text.strip()):
+            try:
+                parsed = orjson.loads(candidate)
+            except orjson.JSONDecodeError:
+                continue
+            if isinstance(parsed, dict):
+                return parsed
+
+        return None
+
+
+# ── JSON extraction helpers ───────────────────────────────────────────
+
 
+def _str_list(value, limit: int | None = None) -> list[str]:
+    """Coerce a parsed JSON value to a list of strings (non-lists → [])."""
+    if not isinstance(value, list):
+        return []
+    return [str(v) for v in value[:limit]]
+
+
+def _json_candidates(text: str) -> Iterator[str]:
+    """Yield progressively narrower JSON candidates from LLM output."""
+    yield text
+
+    fenced = _fenced_block(text)
+    if fenced:
+        yield fenced
+        text = fenced
+
+    block = _first_json_object(text)
+    if block:
+        yield block
+
+
+def _fenced_block(text: str) -> str | None:
+    """Return the body of the first ```json (or bare ```) code fence."""
+    marker = "```json"
+    start = text.find(marker)
+    if start < 0:
+        marker = "```"
+        start = text.find(marker)
+        if start < 0:
+            return None
+    start += len(marker)
+    end = text.find("```", start)
+    if end < 0:
         return None
+    return text[start:end].strip()
+
+
+def _first_json_object(text: str) -> str | None:
+    """Return the first balanced ``{...}`` block, skipping braces in strings."""
+    start = text.find("{")
+    if start < 0:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+
+    return None
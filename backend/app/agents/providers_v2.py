@@ -3,41 +3,92 @@
 Three providers:
 - OllamaProvider: Direct calls to Ollama on Wile/Roadrunner via Tailscale
 - OpenWebUIProvider: Calls to the Open WebUI cluster (OpenAI-compatible)
-- EmbeddingProvider: Embedding generation via Ollama /api/embeddings
+- EmbeddingProvider: Embedding generation via Ollama /api/embed
 """
 
 import asyncio
-import json
+import copy
 import logging
 import time
+from collections import deque
 from typing import AsyncIterator
 
 import httpx
+import orjson
 
 from app.config import settings
+from app.services.cache import SingleFlight
 from .registry import ModelEntry, Node
 
 logger = logging.getLogger(__name__)
 
-# Shared HTTP client with reasonable timeouts
-_client: httpx.AsyncClient | None = None
-
-
-def _get_client() -> httpx.AsyncClient:
-    global _client
-    if _client is None or _client.is_closed:
-        _client = httpx.AsyncClient(
+# One HTTP client per upstream (Wile, Roadrunner, cluster) so a slow 70B
+# generation on one node cannot starve another node's pool.  HTTP/2 is
+# negotiated via ALPN, so concurrent calls to the TLS cluster (e.g. debate
+# perspectives) multiplex over one connection; plain-http Ollama nodes use
+# HTTP/1.1 keep-alive.
+_clients: dict[str, httpx.AsyncClient] = {}
+
+# Request bodies are pre-serialised with orjson and sent as ``content=``.
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _get_client(base_url: str) -> httpx.AsyncClient:
+    client = _clients.get(base_url)
+    if client is None or client.is_closed:
+        # With the httpx[zstd] extra installed, httpx advertises
+        # "Accept-Encoding: gzip, deflate, zstd" and decodes zstd bodies
+        # transparently, so no header or transport override is needed.
+        client = httpx.AsyncClient(
+            http2=True,
             timeout=httpx.Timeout(connect=10, read=300, write=30, pool=10),
-            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            # Headroom for debate fan-out plus streams; idle sockets are kept
+            # for 75s to match nginx's default keepalive_timeout.
+            limits=httpx.Limits(
+                max_connections=200,
+                max_keepalive_connections=100,
+                keepalive_expiry=75.0,
+            ),
         )
-    return _client
+        _clients[base_url] = client
+    return client
 
 
 async def cleanup_client():
-    global _client
-    if _client and not _client.is_closed:
-        await _client.aclose()
-        _client = None
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        if not client.is_closed:
+            await client.aclose()
+
+
+class _LatencyWindow:
+    """Rolling per-model latency samples, used to time generation hedges."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.size = size
+        self.min_samples = min_samples
+        self._samples: dict[str, deque[int]] = {}
+
+    def record(self, model: str, latency_ms: int) -> None:
+        window = self._samples.get(model)
+        if window is None:
+            window = self._samples[model] = deque(maxlen=self.size)
+        window.append(latency_ms)
+
+    def p95(self, model: str) -> int | None:
+        """Return the model's p95 latency in ms, or None until enough samples."""
+        window = self._samples.get(model)
+        if window is None or len(window) < self.min_samples:
+            return None
+        ordered = sorted(window)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def clear(self) -> None:
+        self._samples.clear()
+
+
+_generate_latency = _LatencyWindow()
 
 
 def _ollama_url(node: Node) -> str:
@@ -50,16 +101,132 @@ def _ollama_url(node: Node) -> str:
         raise ValueError(f"No direct Ollama URL for node: {node}")
 
 
+async def _aiter_byte_lines(resp: httpx.Response) -> AsyncIterator[bytes]:
+    """Split a streamed body into raw lines without decoding it to text.
+
+    NDJSON and SSE are framed by ``\\n`` and orjson parses UTF-8 bytes
+    directly, so the text decoding done by ``aiter_lines()`` is wasted.
+    A trailing ``\\r`` is dropped and blank lines are skipped, so callers
+    never need to ``strip()``.
+    """
+    buf = bytearray()
+    async for chunk in resp.aiter_bytes():
+        buf += chunk
+        start = 0
+        while (nl := buf.find(b"\n", start)) >= 0:
+            end = nl - 1 if nl > start and buf[nl - 1] == 0x0D else nl
+            if end > start:
+                yield bytes(buf[start:end])
+            start = nl + 1
+        del buf[:start]
+    if buf.endswith(b"\r"):
+        del buf[-1:]
+    if buf:
+        yield bytes(buf)
+
+
+async def _coalesce_tokens(
+    tokens: AsyncIterator[str], window_ms: int, max_tokens: int,
+) -> AsyncIterator[str]:
+    """Re-chunk a token stream by size (``max_tokens``) or age (``window_ms``).
+
+    The next token is awaited as a task so an idle upstream still flushes
+    the buffer once the window expires; cancelling on timeout would kill
+    the underlying generator.
+    """
+    if max_tokens <= 1:
+        async for token in tokens:
+            yield token
+        return
+
+    loop = asyncio.get_running_loop()
+    window = window_ms / 1000
+    it = tokens.__aiter__()
+    buf: list[str] = []
+    deadline = 0.0
+    pending: asyncio.Future | None = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(it.__anext__())
+            timeout = max(deadline - loop.time(), 0) if buf else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield "".join(buf)
+                buf.clear()
+                continue
+            fut, pending = pending, None
+            try:
+                token = fut.result()
+            except StopAsyncIteration:
+                break
+            if not buf:
+                deadline = loop.time() + window
+            buf.append(token)
+            if len(buf) >= max_tokens:
+                yield "".join(buf)
+                buf.clear()
+        if buf:
+            yield "".join(buf)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        await it.aclose()
+
+
+async def batch_generate(
+    provider: "OllamaProvider | OpenWebUIProvider",
+    prompts: list[str],
+    concurrency: int = 16,
+    **kwargs,
+) -> list[dict]:
+    """Generate completions for many prompts with controlled concurrency.
+
+    Results are returned in prompt order; *kwargs* go to ``provider.generate``.
+    """
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _generate_one(p: str) -> dict:
+        async with sem:
+            return await provider.generate(p, **kwargs)
+
+    return await asyncio.gather(*[_generate_one(p) for p in prompts])
+
+
 # ── Ollama Provider ──────────────────────────────────────────────────
 
 
 class OllamaProvider:
-    """Direct Ollama API calls to Wile or Roadrunner."""
+    """Direct Ollama API calls to Wile or Roadrunner.
 
-    def __init__(self, model: str, node: Node):
+    Requests carry ``keep_alive`` so the model stays resident between calls;
+    Ollama then reuses the KV cache for a byte-identical system/prompt prefix
+    instead of re-running prefill for it.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        node: Node,
+        mirror_node: Node | None = None,
+        hedge_after_ms: int | None = None,
+    ):
         self.model = model
         self.node = node
         self.base_url = _ollama_url(node)
+        # Node that also hosts ``model``; generate() hedges onto it when set.
+        self.mirror_node = mirror_node
+        # Fixed hedge delay; None uses the model's measured p95 latency.
+        self.hedge_after_ms = hedge_after_ms
+        # Fields shared by every request body; calls splat this and add
+        # only what varies instead of rebuilding the whole dict.
+        self._payload_skel = {
+            "model": self.model,
+            "keep_alive": settings.OLLAMA_KEEP_ALIVE,
+        }
+        self._generate_url = f"{self.base_url}/api/generate"
+        self._chat_url = f"{self.base_url}/api/chat"
 
     async def generate(
         self,
@@ -69,40 +236,106 @@ class OllamaProvider:
         temperature: float = 0.3,
     ) -> dict:
         """Generate a completion. Returns dict with 'response', 'model', 'total_duration', etc."""
-        client = _get_client()
+        if self.mirror_node is not None:
+            return await self.generate_hedged(
+                prompt, system=system, max_tokens=max_tokens,
+                temperature=temperature,
+            )
+        return await self._generate(prompt, system, max_tokens, temperature)
+
+    async def generate_hedged(
+        self,
+        prompt: str,
+        system: str = "",
+        max_tokens: int = 2048,
+        temperature: float = 0.3,
+        mirror_node: Node | None = None,
+        hedge_after_ms: int | None = None,
+    ) -> dict:
+        """Generate, racing a duplicate on the mirror node if the primary is slow.
+
+        The duplicate is sent once the primary has run longer than the
+        model's observed p95 latency (or ``hedge_after_ms``, if given), and
+        straight away if the primary fails before then.  Until enough calls
+        have been timed, only the failover applies.  The first successful
+        result wins and the other request is cancelled; if both fail, the
+        primary's error is raised.
+        """
+        mirror_node = mirror_node or self.mirror_node
+        if hedge_after_ms is None:
+            hedge_after_ms = self.hedge_after_ms
+        if hedge_after_ms is None:
+            hedge_after_ms = _generate_latency.p95(self.model)
+        delay = hedge_after_ms / 1000 if hedge_after_ms is not None else None
+        args = (prompt, system, max_tokens, temperature)
+
+        tasks = [asyncio.create_task(self._generate(*args))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            failed = bool(done) and tasks[0].exception() is not None
+            if (failed or not done) and mirror_node is not None and mirror_node != self.node:
+                logger.info(
+                    "Ollama [%s] %s: %s, hedging on %s",
+                    self.node, self.model,
+                    "failed" if failed else f"no response after {hedge_after_ms}ms",
+                    mirror_node,
+                )
+                mirror = OllamaProvider(self.model, mirror_node)
+                tasks.append(asyncio.create_task(mirror._generate(*args)))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            return await tasks[0]
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _generate(
+        self,
+        prompt: str,
+        system: str,
+        max_tokens: int,
+        temperature: float,
+    ) -> dict:
+        client = _get_client(self.base_url)
         payload = {
-            "model": self.model,
+            **self._payload_skel,
             "prompt": prompt,
             "stream": False,
-            "options": {
-                "num_predict": max_tokens,
-                "temperature": temperature,
-            },
+            "options": {"num_predict": max_tokens, "temperature": temperature},
         }
         if system:
             payload["system"] = system
 
-        start = time.monotonic()
+        start_ns = time.perf_counter_ns()
         try:
             resp = await client.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
+                self._generate_url, content=orjson.dumps(payload), headers=_JSON_HEADERS,
             )
             resp.raise_for_status()
-            data = resp.json()
-            latency_ms = int((time.monotonic() - start) * 1000)
+            data = orjson.loads(resp.content)
+            latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
             data["_latency_ms"] = latency_ms
-            data["_node"] = self.node.value
-            logger.info(
-                f"Ollama [{self.node.value}] {self.model}: "
-                f"{latency_ms}ms, {data.get('eval_count', '?')} tokens"
-            )
+            data["_node"] = str(self.node)
+            _generate_latency.record(self.model, latency_ms)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Ollama [%s] %s: %dms, %s tokens",
+                    self.node, self.model, latency_ms, data.get("eval_count", "?"),
+                )
             return data
         except httpx.HTTPStatusError as e:
-            logger.error(f"Ollama HTTP error [{self.node.value}]: {e.response.status_code} {e.response.text[:200]}")
+            logger.error(f"Ollama HTTP error [{self.node}]: {e.response.status_code} {e.response.text[:200]}")
             raise
         except httpx.ConnectError as e:
-            logger.error(f"Cannot reach Ollama on {self.node.value} ({self.base_url}): {e}")
+            logger.error(f"Cannot reach Ollama on {self.node} ({self.base_url}): {e}")
             raise
 
     async def chat(
@@ -112,23 +345,24 @@ class OllamaProvider:
         temperature: float = 0.3,
     ) -> dict:
         """Chat completion via Ollama /api/chat."""
-        client = _get_client()
+        client = _get_client(self.base_url)
         payload = {
-            "model": self.model,
+            **self._payload_skel,
             "messages": messages,
             "stream": False,
-            "options": {
-                "num_predict": max_tokens,
-                "temperature": temperature,
-            },
+            "options": {"num_predict": max_tokens, "temperature": temperature},
         }
 
-        start = time.monotonic()
-        resp = await client.post(f"{self.base_url}/api/chat", json=payload)
+        start_ns = time.perf_counter_ns()
+        resp = await client.post(
+            self._chat_url,
+            content=orjson.dumps(payload),
+            headers=_JSON_HEADERS,
+        )
         resp.raise_for_status()
-        data = resp.json()
-        data["_latency_ms"] = int((time.monotonic() - start) * 1000)
-        data["_node"] = self.node.value
+        data = orjson.loads(resp.content)
+        data["_latency_ms"] = (time.perf_counter_ns() - start_ns) // 1_000_000
+        data["_node"] = str(self.node)
         return data
 
     async def generate_stream(
@@ -137,42 +371,52 @@ class OllamaProvider:
         system: str = "",
         max_tokens: int = 2048,
         temperature: float = 0.3,
+        chunk_window_ms: int = 50,
+        chunk_max_tokens: int = 16,
     ) -> AsyncIterator[str]:
-        """Stream tokens from Ollama."""
-        client = _get_client()
+        """Stream tokens from Ollama, coalesced into small chunks.
+
+        A chunk is yielded once ``chunk_max_tokens`` tokens are buffered or
+        ``chunk_window_ms`` has passed since its first token; pass
+        ``chunk_max_tokens=1`` for one yield per token.
+        """
+        client = _get_client(self.base_url)
         payload = {
-            "model": self.model,
+            **self._payload_skel,
             "prompt": prompt,
             "stream": True,
-            "options": {
-                "num_predict": max_tokens,
-                "temperature": temperature,
-            },
+            "options": {"num_predict": max_tokens, "temperature": temperature},
         }
         if system:
             payload["system"] = system
 
-        async with client.stream(
-            "POST", f"{self.base_url}/api/generate", json=payload
-        ) as resp:
-            resp.raise_for_status()
-            async for line in resp.aiter_lines():
-                if line.strip():
+        async def _tokens() -> AsyncIterator[str]:
+            async with client.stream(
+                "POST",
+                self._generate_url,
+                content=orjson.dumps(payload),
+                headers=_JSON_HEADERS,
+            ) as resp:
+                resp.raise_for_status()
+                async for line in _aiter_byte_lines(resp):
                     try:
-                        chunk = json.loads(line)
-                        token = chunk.get("response", "")
-                        if token:
-                            yield token
-                        if chunk.get("done"):
-                            break
-                    except json.JSONDecodeError:
+                        chunk = orjson.loads(line)
+                    except orjson.JSONDecodeError:
                         continue
+                    token = chunk.get("response", "")
+                    if token:
+                        yield token
+                    if chunk.get("done"):
+                        break
+
+        async for chunk in _coalesce_tokens(_tokens(), chunk_window_ms, chunk_max_tokens):
+            yield chunk
 
     async def is_available(self) -> bool:
-        """Ping the Ollama node."""
+        """Ping the Ollama node (``/api/version`` is tiny, unlike ``/api/tags``)."""
         try:
-            client = _get_client()
-            resp = await client.get(f"{self.base_url}/api/tags", timeout=5)
+            client = _get_client(self.base_url)
+            resp = await client.get(f"{self.base_url}/api/version", timeout=3)
             return resp.status_code == 200
         except Exception:
             return False
@@ -191,12 +435,13 @@ class OpenWebUIProvider:
         self.model = model or settings.DEFAULT_FAST_MODEL
         self.base_url = settings.OPENWEBUI_URL.rstrip("/")
         self.api_key = settings.OPENWEBUI_API_KEY
+        # Built once; httpx copies request headers, so sharing is safe.
+        self._cached_headers = dict(_JSON_HEADERS)
+        if self.api_key:
+            self._cached_headers["Authorization"] = f"Bearer {self.api_key}"
 
     def _headers(self) -> dict:
-        h = {"Content-Type": "application/json"}
-        if self.api_key:
-            h["Authorization"] = f"Bearer {self.api_key}"
-        return h
+        return self._cached_headers
 
     async def chat(
         self,
@@ -205,7 +450,7 @@ class OpenWebUIProvider:
         temperature: float = 0.3,
     ) -> dict:
         """Chat completion via OpenAI-compatible endpoint."""
-        client = _get_client()
+        client = _get_client(self.base_url)
         payload = {
             "model": self.model,
             "messages": messages,
@@ -214,15 +459,15 @@ class OpenWebUIProvider:
             "stream": False,
         }
 
-        start = time.monotonic()
+        start_ns = time.perf_counter_ns()
         resp = await client.post(
             f"{self.base_url}/v1/chat/completions",
-            json=payload,
+            content=orjson.dumps(payload),
             headers=self._headers(),
         )
         resp.raise_for_status()
-        data = resp.json()
-        latency_ms = int((time.monotonic() - start) * 1000)
+        data = orjson.loads(resp.content)
+        latency_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
 
         # Normalize to our format
         content = ""
@@ -236,9 +481,7 @@ class OpenWebUIProvider:
             "_node": "cluster",
             "_usage": data.get("usage", {}),
         }
-        logger.info(
-            f"OpenWebUI cluster {self.model}: {latency_ms}ms"
-        )
+        logger.info("OpenWebUI cluster %s: %dms", self.model, latency_ms)
         return result
 
     async def generate(
@@ -260,9 +503,11 @@ class OpenWebUIProvider:
         messages: list[dict],
         max_tokens: int = 2048,
         temperature: float = 0.3,
+        chunk_window_ms: int = 50,
+        chunk_max_tokens: int = 16,
     ) -> AsyncIterator[str]:
-        """Stream tokens from OpenWebUI."""
-        client = _get_client()
+        """Stream tokens from OpenWebUI, coalesced as in ``OllamaProvider.generate_stream``."""
+        client = _get_client(self.base_url)
         payload = {
             "model": self.model,
             "messages": messages,
@@ -271,36 +516,48 @@ class OpenWebUIProvider:
             "stream": True,
         }
 
-        async with client.stream(
-            "POST",
-            f"{self.base_url}/v1/chat/completions",
-            json=payload,
-            headers=self._headers(),
-        ) as resp:
-            resp.raise_for_status()
-            async for line in resp.aiter_lines():
-                if line.startswith("data: "):
-                    data_str = line[6:].strip()
-                    if data_str == "[DONE]":
+        async def _tokens() -> AsyncIterator[str]:
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/v1/chat/completions",
+                content=orjson.dumps(payload),
+                headers=self._headers(),
+            ) as resp:
+                resp.raise_for_status()
+                async for line in _aiter_byte_lines(resp):
+                    if not line.startswith(b"data: "):
+                        continue
+                    # memoryview slice: orjson reads the payload in place.
+                    data = memoryview(line)[6:]
+                    if data == b"[DONE]":
                         break
                     try:
-                        chunk = json.loads(data_str)
-                        delta = chunk.get("choices", [{}])[0].get("delta", {})
-                        token = delta.get("content", "")
-                        if token:
-                            yield token
-                    except json.JSONDecodeError:
+                        chunk = orjson.loads(data)
+                    except orjson.JSONDecodeError:
                         continue
+                    delta = chunk.get("choices", [{}])[0].get("delta", {})
+                    token = delta.get("content", "")
+                    if token:
+                        yield token
+
+        async for chunk in _coalesce_tokens(_tokens(), chunk_window_ms, chunk_max_tokens):
+            yield chunk
 
     async def is_available(self) -> bool:
-        """Check if Open WebUI is reachable."""
+        """Check if Open WebUI is reachable.
+
+        Uses the lightweight ``/health`` endpoint, falling back to the model
+        list on deployments that do not expose it.
+        """
         try:
-            client = _get_client()
-            resp = await client.get(
-                f"{self.base_url}/v1/models",
-                headers=self._headers(),
-                timeout=5,
-            )
+            client = _get_client(self.base_url)
+            resp = await client.get(f"{self.base_url}/health", timeout=3)
+            if resp.status_code == 404:
+                resp = await client.get(
+                    f"{self.base_url}/v1/models",
+                    headers=self._headers(),
+                    timeout=3,
+                )
             return resp.status_code == 200
         except Exception:
             return False
@@ -310,40 +567,128 @@ class OpenWebUIProvider:
 
 
 class EmbeddingProvider:
-    """Generate embeddings via Ollama /api/embeddings."""
+    """Generate embeddings via Ollama /api/embed.
+
+    Concurrent ``embed()`` calls are coalesced: texts arriving within
+    ``batch_window_ms`` of each other (up to ``max_batch``) are sent as one
+    ``input`` array, so the node embeds them in a single forward pass.
+    """
 
-    def __init__(self, model: str = "", node: Node = Node.ROADRUNNER):
+    def __init__(
+        self,
+        model: str = "",
+        node: Node = Node.ROADRUNNER,
+        max_batch: int = 32,
+        batch_window_ms: int = 10,
+    ):
         self.model = model or settings.DEFAULT_EMBEDDING_MODEL
         self.node = node
         self.base_url = _ollama_url(node)
+        self.max_batch = max_batch
+        self.batch_window = batch_window_ms / 1000
+        # Coalescer state, bound lazily to the running event loop
+        self._queue: asyncio.Queue | None = None
+        self._batcher: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._flushes: set[asyncio.Task] = set()
 
     async def embed(self, text: str) -> list[float]:
         """Get embedding vector for a single text."""
-        client = _get_client()
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._batcher is None or self._batcher.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._batcher = loop.create_task(self._run_batcher())
+        fut = loop.create_future()
+        self._queue.put_nowait((text, fut))
+        return await fut
+
+    async def embed_batch(self, texts: list[str], concurrency: int = 5) -> list[list[float]]:
+        """Embed multiple texts, ``max_batch`` per request, with controlled concurrency.
+
+        A fixed pool of ``concurrency`` workers drains the chunk queue, so a
+        large batch creates a handful of tasks rather than one per chunk.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        for i in range(0, len(texts), self.max_batch):
+            queue.put_nowait((i, texts[i:i + self.max_batch]))
+        results: list[list[float] | None] = [None] * len(texts)
+
+        async def _worker() -> None:
+            while True:
+                try:
+                    start, chunk = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                results[start:start + len(chunk)] = await self._embed_many(chunk)
+
+        await asyncio.gather(*[_worker() for _ in range(min(concurrency, queue.qsize()))])
+        return results
+
+    async def _embed_many(self, texts: list[str]) -> list[list[float]]:
+        client = _get_client(self.base_url)
         resp = await client.post(
-            f"{self.base_url}/api/embeddings",
-            json={"model": self.model, "prompt": text},
+            f"{self.base_url}/api/embed",
+            content=orjson.dumps({"model": self.model, "input": texts}),
+            headers=_JSON_HEADERS,
         )
         resp.raise_for_status()
-        data = resp.json()
-        return data.get("embedding", [])
-
-    async def embed_batch(self, texts: list[str], concurrency: int = 5) -> list[list[float]]:
-        """Embed multiple texts with controlled concurrency."""
-        sem = asyncio.Semaphore(concurrency)
+        data = orjson.loads(resp.content)
+        embeddings = data.get("embeddings", [])
+        if len(embeddings) != len(texts):
+            raise ValueError(
+                f"Ollama returned {len(embeddings)} embeddings for {len(texts)} inputs"
+            )
+        return embeddings
+
+    async def _run_batcher(self) -> None:
+        """Drain the queue into batches and dispatch each without blocking."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            task = loop.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        try:
+            embeddings = await self._embed_many([text for text, _ in batch])
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut), vec in zip(batch, embeddings):
+            if not fut.done():
+                fut.set_result(vec)
 
-        async def _embed_one(t: str) -> list[float]:
-            async with sem:
-                return await self.embed(t)
 
-        return await asyncio.gather(*[_embed_one(t) for t in texts])
+# ── Health check for all nodes ────────────────────────────────────────
 
 
-# ── Health check for all nodes ────────────────────────────────────────
+NODE_HEALTH_TTL = 5.0
 
 
 async def check_all_nodes() -> dict:
-    """Check availability of all LLM nodes."""
+    """Check availability of all LLM nodes.
+
+    Results are reused for ``NODE_HEALTH_TTL`` seconds, and callers arriving
+    while a probe is running share it, so frequent /health polling does not
+    multiply requests to the nodes.
+    """
+    return copy.deepcopy(await _node_health.get())
+
+
+async def _probe_all_nodes() -> dict:
     wile = OllamaProvider("", Node.WILE)
     roadrunner = OllamaProvider("", Node.ROADRUNNER)
     cluster = OpenWebUIProvider()
@@ -360,3 +705,6 @@ async def check_all_nodes() -> dict:
         "roadrunner": {"available": rr_ok is True, "url": settings.roadrunner_url},
         "cluster": {"available": cl_ok is True, "url": settings.OPENWEBUI_URL},
     }
+
+
+_node_health = SingleFlight(_probe_all_nodes, NODE_HEALTH_TTL)
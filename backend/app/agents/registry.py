@@ -5,33 +5,34 @@ performance tier (fast, medium, heavy) for the TaskRouter.
 """
 
 from dataclasses import dataclass, field
-from enum import Enum
+from typing import Iterator
+from enum import StrEnum
 
 
-class Capability(str, Enum):
+class Capability(StrEnum):
     CHAT = "chat"
     CODE = "code"
     VISION = "vision"
     EMBEDDING = "embedding"
 
 
-class Tier(str, Enum):
+class Tier(StrEnum):
     FAST = "fast"        # < 15B params — quick responses
     MEDIUM = "medium"    # 15–40B params — balanced
     HEAVY = "heavy"      # 40B+ params — deep analysis
 
 
-class Node(str, Enum):
+class Node(StrEnum):
     WILE = "wile"
     ROADRUNNER = "roadrunner"
     CLUSTER = "cluster"  # Open WebUI balances across both
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ModelEntry:
     name: str
     node: Node
-    capabilities: list[Capability]
+    capabilities: tuple[Capability, ...]
     tier: Tier
     param_size: str = ""  # e.g. "7b", "70b"
     notes: str = ""
@@ -41,51 +42,51 @@ class ModelEntry:
 
 ROADRUNNER_MODELS: list[ModelEntry] = [
     # General / chat
-    ModelEntry("llama3.1:latest", Node.ROADRUNNER, [Capability.CHAT], Tier.FAST, "8b"),
-    ModelEntry("qwen2.5:14b-instruct", Node.ROADRUNNER, [Capability.CHAT], Tier.FAST, "14b"),
-    ModelEntry("mistral:7b-instruct", Node.ROADRUNNER, [Capability.CHAT], Tier.FAST, "7b"),
-    ModelEntry("mistral:7b", Node.ROADRUNNER, [Capability.CHAT], Tier.FAST, "7b"),
-    ModelEntry("qwen2.5:7b", Node.ROADRUNNER, [Capability.CHAT], Tier.FAST, "7b"),
-    ModelEntry("phi3:medium", Node.ROADRUNNER, [Capability.CHAT], Tier.MEDIUM, "14b"),
+    ModelEntry("llama3.1:latest", Node.ROADRUNNER, (Capability.CHAT,), Tier.FAST, "8b"),
+    ModelEntry("qwen2.5:14b-instruct", Node.ROADRUNNER, (Capability.CHAT,), Tier.FAST, "14b"),
+    ModelEntry("mistral:7b-instruct", Node.ROADRUNNER, (Capability.CHAT,), Tier.FAST, "7b"),
+    ModelEntry("mistral:7b", Node.ROADRUNNER, (Capability.CHAT,), Tier.FAST, "7b"),
+    ModelEntry("qwen2.5:7b", Node.ROADRUNNER, (Capability.CHAT,), Tier.FAST, "7b"),
+    ModelEntry("phi3:medium", Node.ROADRUNNER, (Capability.CHAT,), Tier.MEDIUM, "14b"),
     # Code
-    ModelEntry("qwen2.5-coder:7b", Node.ROADRUNNER, [Capability.CODE], Tier.FAST, "7b"),
-    ModelEntry("qwen2.5-coder:latest", Node.ROADRUNNER, [Capability.CODE], Tier.FAST, "7b"),
-    ModelEntry("codestral:latest", Node.ROADRUNNER, [Capability.CODE], Tier.MEDIUM, "22b"),
-    ModelEntry("codellama:13b", Node.ROADRUNNER, [Capability.CODE], Tier.FAST, "13b"),
+    ModelEntry("qwen2.5-coder:7b", Node.ROADRUNNER, (Capability.CODE,), Tier.FAST, "7b"),
+    ModelEntry("qwen2.5-coder:latest", Node.ROADRUNNER, (Capability.CODE,), Tier.FAST, "7b"),
+    ModelEntry("codestral:latest", Node.ROADRUNNER, (Capability.CODE,), Tier.MEDIUM, "22b"),
+    ModelEntry("codellama:13b", Node.ROADRUNNER, (Capability.CODE,), Tier.FAST, "13b"),
     # Vision
-    ModelEntry("llama3.2-vision:11b", Node.ROADRUNNER, [Capability.VISION], Tier.FAST, "11b"),
-    ModelEntry("minicpm-v:latest", Node.ROADRUNNER, [Capability.VISION], Tier.FAST, "8b"),
-    ModelEntry("llava:13b", Node.ROADRUNNER, [Capability.VISION], Tier.FAST, "13b"),
+    ModelEntry("llama3.2-vision:11b", Node.ROADRUNNER, (Capability.VISION,), Tier.FAST, "11b"),
+    ModelEntry("minicpm-v:latest", Node.ROADRUNNER, (Capability.VISION,), Tier.FAST, "8b"),
+    ModelEntry("llava:13b", Node.ROADRUNNER, (Capability.VISION,), Tier.FAST, "13b"),
     # Embeddings
-    ModelEntry("bge-m3:latest", Node.ROADRUNNER, [Capability.EMBEDDING], Tier.FAST, "0.6b"),
-    ModelEntry("nomic-embed-text:latest", Node.ROADRUNNER, [Capability.EMBEDDING], Tier.FAST, "0.1b"),
+    ModelEntry("bge-m3:latest", Node.ROADRUNNER, (Capability.EMBEDDING,), Tier.FAST, "0.6b"),
+    ModelEntry("nomic-embed-text:latest", Node.ROADRUNNER, (Capability.EMBEDDING,), Tier.FAST, "0.1b"),
     # Heavy
-    ModelEntry("llama3.1:70b-instruct-q4_K_M", Node.ROADRUNNER, [Capability.CHAT], Tier.HEAVY, "70b"),
+    ModelEntry("llama3.1:70b-instruct-q4_K_M", Node.ROADRUNNER, (Capability.CHAT,), Tier.HEAVY, "70b"),
 ]
 
 # ── Wile (100.110.190.12) ────────────────────────────────────────────
 
 WILE_MODELS: list[ModelEntry] = [
     # General / chat
-    ModelEntry("llama3.1:latest", Node.WILE, [Capability.CHAT], Tier.FAST, "8b"),
-    ModelEntry("llama3:latest", Node.WILE, [Capability.CHAT], Tier.FAST, "8b"),
-    ModelEntry("gemma2:27b", Node.WILE, [Capability.CHAT], Tier.MEDIUM, "27b"),
+    ModelEntry("llama3.1:latest", Node.WILE, (Capability.CHAT,), Tier.FAST, "8b"),
+    ModelEntry("llama3:latest", Node.WILE, (Capability.CHAT,), Tier.FAST, "8b"),
+    ModelEntry("gemma2:27b", Node.WILE, (Capability.CHAT,), Tier.MEDIUM, "27b"),
     # Code
-    ModelEntry("qwen2.5-coder:7b", Node.WILE, [Capability.CODE], Tier.FAST, "7b"),
-    ModelEntry("qwen2.5-coder:latest", Node.WILE, [Capability.CODE], Tier.FAST, "7b"),
-    ModelEntry("qwen2.5-coder:32b", Node.WILE, [Capability.CODE], Tier.MEDIUM, "32b"),
-    ModelEntry("deepseek-coder:33b", Node.WILE, [Capability.CODE], Tier.MEDIUM, "33b"),
-    ModelEntry("codestral:latest", Node.WILE, [Capability.CODE], Tier.MEDIUM, "22b"),
+    ModelEntry("qwen2.5-coder:7b", Node.WILE, (Capability.CODE,), Tier.FAST, "7b"),
+    ModelEntry("qwen2.5-coder:latest", Node.WILE, (Capability.CODE,), Tier.FAST, "7b"),
+    ModelEntry("qwen2.5-coder:32b", Node.WILE, (Capability.CODE,), Tier.MEDIUM, "32b"),
+    ModelEntry("deepseek-coder:33b", Node.WILE, (Capability.CODE,), Tier.MEDIUM, "33b"),
+    ModelEntry("codestral:latest", Node.WILE, (Capability.CODE,), Tier.MEDIUM, "22b"),
     # Vision
-    ModelEntry("llava:13b", Node.WILE, [Capability.VISION], Tier.FAST, "13b"),
+    ModelEntry("llava:13b", Node.WILE, (Capability.VISION,), Tier.FAST, "13b"),
     # Embeddings
-    ModelEntry("bge-m3:latest", Node.WILE, [Capability.EMBEDDING], Tier.FAST, "0.6b"),
+    ModelEntry("bge-m3:latest", Node.WILE, (Capability.EMBEDDING,), Tier.FAST, "0.6b"),
     # Heavy
-    ModelEntry("llama3.1:70b", Node.WILE, [Capability.CHAT], Tier.HEAVY, "70b"),
-    ModelEntry("llama3.1:70b-instruct-q4_K_M", Node.WILE, [Capability.CHAT], Tier.HEAVY, "70b"),
-    ModelEntry("llama3.1:70b-instruct-q5_K_M", Node.WILE, [Capability.CHAT], Tier.HEAVY, "70b"),
-    ModelEntry("mixtral:8x22b-instruct", Node.WILE, [Capability.CHAT], Tier.HEAVY, "141b"),
-    ModelEntry("qwen2:72b-instruct", Node.WILE, [Capability.CHAT], Tier.HEAVY, "72b"),
+    ModelEntry("llama3.1:70b", Node.WILE, (Capability.CHAT,), Tier.HEAVY, "70b"),
+    ModelEntry("llama3.1:70b-instruct-q4_K_M", Node.WILE, (Capability.CHAT,), Tier.HEAVY, "70b"),
+    ModelEntry("llama3.1:70b-instruct-q5_K_M", Node.WILE, (Capability.CHAT,), Tier.HEAVY, "70b"),
+    ModelEntry("mixtral:8x22b-instruct", Node.WILE, (Capability.CHAT,), Tier.HEAVY, "141b"),
+    ModelEntry("qwen2:72b-instruct", Node.WILE, (Capability.CHAT,), Tier.HEAVY, "72b"),
 ]
 
 ALL_MODELS = ROADRUNNER_MODELS + WILE_MODELS
@@ -99,6 +100,9 @@ class ModelRegistry:
         self._by_name: dict[str, list[ModelEntry]] = {}
         self._by_capability: dict[Capability, list[ModelEntry]] = {}
         self._by_node: dict[Node, list[ModelEntry]] = {}
+        # (capability, tier | None, node | None) → entries in registry order;
+        # None means "any", so get_best's fallbacks are plain lookups.
+        self._by_cap_tier_node: dict[tuple, list[ModelEntry]] = {}
         self._index()
 
     def _index(self):
@@ -106,6 +110,9 @@ class ModelRegistry:
             self._by_name.setdefault(m.name, []).append(m)
             for cap in m.capabilities:
                 self._by_capability.setdefault(cap, []).append(m)
+                for tier in (m.tier, None):
+                    for node in (m.node, None):
+                        self._by_cap_tier_node.setdefault((cap, tier, node), []).append(m)
             self._by_node.setdefault(m.node, []).append(m)
 
     def find(
@@ -113,16 +120,23 @@ class ModelRegistry:
         capability: Capability | None = None,
         tier: Tier | None = None,
         node: Node | None = None,
-    ) -> list[ModelEntry]:
-        """Find models matching all given criteria."""
-        results = list(self.models)
+    ) -> Iterator[ModelEntry]:
+        """Lazily yield models matching all given criteria, in registry order.
+
+        Wrap in ``list()`` when the caller needs ``len()`` or indexing.
+        """
         if capability:
-            results = [m for m in results if capability in m.capabilities]
+            it = iter(self._by_capability.get(capability, ()))
+        elif node:
+            it = iter(self._by_node.get(node, ()))
+            node = None
+        else:
+            it = iter(self.models)
         if tier:
-            results = [m for m in results if m.tier == tier]
+            it = (m for m in it if m.tier == tier)
         if node:
-            results = [m for m in results if m.node == node]
-        return results
+            it = (m for m in it if m.node == node)
+        return it
 
     def get_best(
         self,
@@ -131,12 +145,24 @@ class ModelRegistry:
         prefer_node: Node | None = None,
     ) -> ModelEntry | None:
         """Get the best model for a capability, with optional preference."""
-        candidates = self.find(capability=capability, tier=prefer_tier, node=prefer_node)
-        if not candidates:
-            candidates = self.find(capability=capability, tier=prefer_tier)
-        if not candidates:
-            candidates = self.find(capability=capability)
-        return candidates[0] if candidates else None
+        for key in (
+            (capability, prefer_tier, prefer_node),
+            (capability, prefer_tier, None),
+            (capability, None, None),
+        ):
+            candidates = self._by_cap_tier_node.get(key)
+            if candidates:
+                return candidates[0]
+        return None
+
+    def get_by_name(self, name: str) -> ModelEntry | None:
+        """Return the first registered entry for *name*, if any."""
+        entries = self._by_name.get(name)
+        return entries[0] if entries else None
+
+    def nodes_for(self, name: str) -> list[Node]:
+        """Return every node that hosts *name*, in registry order."""
+        return [m.node for m in self._by_name.get(name, [])]
 
     def list_nodes(self) -> list[Node]:
         return list(self._by_node.keys())
@@ -148,9 +174,9 @@ class ModelRegistry:
         return [
             {
                 "name": m.name,
-                "node": m.node.value,
-                "capabilities": [c.value for c in m.capabilities],
-                "tier": m.tier.value,
+                "node": m.node,
+                "capabilities": list(m.capabilities),
+                "tier": m.tier,
                 "param_size": m.param_size,
             }
             for m in self.models
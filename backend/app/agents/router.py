@@ -9,8 +9,13 @@ Routes based on task characteristics:
 """
 
 import logging
+import re
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from enum import Enum
+from enum import StrEnum
+from functools import lru_cache
+from typing import Callable
 
 from app.config import settings
 from .registry import Capability, Tier, Node, ModelEntry, registry
@@ -19,7 +24,7 @@ from .providers_v2 import OllamaProvider, OpenWebUIProvider, EmbeddingProvider
 logger = logging.getLogger(__name__)
 
 
-class TaskType(str, Enum):
+class TaskType(StrEnum):
     QUICK_CHAT = "quick_chat"
     DEEP_ANALYSIS = "deep_analysis"
     CODE_ANALYSIS = "code_analysis"
@@ -31,7 +36,7 @@ class TaskType(str, Enum):
     DEBATE_JUDGE = "debate_judge"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class RoutingDecision:
     """Result of the routing decision."""
     model: str
@@ -39,6 +44,7 @@ class RoutingDecision:
     task_type: TaskType
     provider_type: str  # "ollama" or "openwebui"
     reason: str
+    mirror_node: Node | None = None  # hedge target hosting the same model
 
 
 class TaskRouter:
@@ -65,24 +71,79 @@ class TaskRouter:
         TaskType.DEBATE_JUDGE: "gemma2:27b",
     }
 
+    # Seconds an explicit-override decision is reused for (task_type, override)
+    ROUTE_CACHE_TTL: float = 5.0
+
+    # Providers kept at most (LRU); every unknown override model adds one
+    PROVIDER_CACHE_MAX: int = 64
+
     def __init__(self):
         self.registry = registry
+        self._route_cache: dict[tuple, tuple[float, RoutingDecision]] = {}
+        self._dispatch: dict[TaskType, Callable[[str | None], RoutingDecision]] = {}
+        self._build_dispatch()
+        # Providers hold only configuration, so one instance per
+        # (provider_type, model, node, mirror_node) is shared across requests.
+        self._providers: OrderedDict[tuple, OllamaProvider | OpenWebUIProvider] = OrderedDict()
 
     def route(self, task_type: TaskType, model_override: str | None = None) -> RoutingDecision:
-        """Decide which model and node to use for a task."""
+        """Decide which model and node to use for a task.
+
+        Without an override the answer depends only on the registry, so each
+        task type dispatches to a function closed over its pre-resolved
+        decision.  Override decisions are cached for ``ROUTE_CACHE_TTL``
+        seconds.
+        """
+        dispatch = self._dispatch.get(task_type)
+        if dispatch is not None:
+            return dispatch(model_override)
+        return self._override_route(task_type, model_override)
+
+    def _override_route(self, task_type: TaskType, model_override: str | None) -> RoutingDecision:
+        key = (task_type, model_override)
+        now = time.monotonic()
+        hit = self._route_cache.get(key)
+        if hit is not None and now - hit[0] < self.ROUTE_CACHE_TTL:
+            return hit[1]
+
+        decision = self._route(task_type, model_override)
+        # Only registry models are cached, which bounds the cache to
+        # registry size x task types; unknown names come from the client
+        # and resolve to a cluster decision without any lookup cost anyway.
+        if decision.provider_type == "ollama":
+            self._route_cache[key] = (now, decision)
+        return decision
+
+    def invalidate_route_cache(self) -> None:
+        """Re-resolve routing decisions, e.g. after the registry changes."""
+        self._route_cache.clear()
+        self._build_dispatch()
+
+    def _build_dispatch(self) -> None:
+        def _specialize(task_type: TaskType, decision: RoutingDecision):
+            override_route = self._override_route
+
+            def dispatch(model_override: str | None) -> RoutingDecision:
+                if model_override is None:
+                    return decision
+                return override_route(task_type, model_override)
+
+            return dispatch
+
+        self._dispatch = {tt: _specialize(tt, self._route(tt, None)) for tt in TaskType}
 
+    def _route(self, task_type: TaskType, model_override: str | None) -> RoutingDecision:
         # Explicit model override
         if model_override:
-            entries = self.registry.find()
-            for entry in entries:
-                if entry.name == model_override:
-                    return RoutingDecision(
-                        model=model_override,
-                        node=entry.node,
-                        task_type=task_type,
-                        provider_type="ollama",
-                        reason=f"Explicit model override: {model_override}",
-                    )
+            entry = self.registry.get_by_name(model_override)
+            if entry:
+                return RoutingDecision(
+                    model=model_override,
+                    node=entry.node,
+                    task_type=task_type,
+                    provider_type="ollama",
+                    reason=f"Explicit model override: {model_override}",
+                )
             # Model not in registry — try via cluster
             return RoutingDecision(
                 model=model_override,
@@ -95,16 +156,24 @@ class TaskRouter:
         # Debate model overrides
         if task_type in self.DEBATE_MODEL_OVERRIDES:
             model_name = self.DEBATE_MODEL_OVERRIDES[task_type]
-            entries = self.registry.find()
-            for entry in entries:
-                if entry.name == model_name:
-                    return RoutingDecision(
-                        model=model_name,
-                        node=entry.node,
-                        task_type=task_type,
-                        provider_type="ollama",
-                        reason=f"Debate role {task_type.value} → {model_name} on {entry.node.value}",
+            entry = self.registry.get_by_name(model_name)
+            if entry:
+                # Heavy models on a congested Tailscale link are the tail
+                # latency risk; hedge them onto another node hosting the model.
+                mirror = None
+                if entry.tier == Tier.HEAVY:
+                    mirror = next(
+                        (n for n in self.registry.nodes_for(model_name) if n != entry.node),
+                        None,
                     )
+                return RoutingDecision(
+                    model=model_name,
+                    node=entry.node,
+                    task_type=task_type,
+                    provider_type="ollama",
+                    reason=f"Debate role {task_type} → {model_name} on {entry.node}",
+                    mirror_node=mirror,
+                )
 
         # Standard routing
         cap, tier, node = self.ROUTING_RULES.get(
@@ -119,7 +188,7 @@ class TaskRouter:
                 node=entry.node,
                 task_type=task_type,
                 provider_type="ollama",
-                reason=f"Auto-routed {task_type.value}: {cap.value}/{tier.value if tier else 'any'} → {entry.name} on {entry.node.value}",
+                reason=f"Auto-routed {task_type}: {cap}/{tier or 'any'} → {entry.name} on {entry.node}",
             )
 
         # Fallback to cluster
@@ -133,11 +202,28 @@ class TaskRouter:
         )
 
     def get_provider(self, decision: RoutingDecision):
-        """Create the appropriate provider for a routing decision."""
+        """Return the (cached) provider for a routing decision."""
+        key = (decision.provider_type, decision.model, decision.node, decision.mirror_node)
+        provider = self._providers.get(key)
+        if provider is not None:
+            self._providers.move_to_end(key)
+            return provider
         if decision.provider_type == "openwebui":
-            return OpenWebUIProvider(model=decision.model)
+            provider = OpenWebUIProvider(model=decision.model)
         else:
-            return OllamaProvider(model=decision.model, node=decision.node)
+            provider = OllamaProvider(
+                model=decision.model,
+                node=decision.node,
+                mirror_node=decision.mirror_node,
+            )
+        self._providers[key] = provider
+        if len(self._providers) > self.PROVIDER_CACHE_MAX:
+            self._providers.popitem(last=False)
+        return provider
+
+    def invalidate_provider_cache(self) -> None:
+        """Drop cached providers, e.g. after node URLs or API keys change."""
+        self._providers.clear()
 
     def get_embedding_provider(self, model: str | None = None, node: Node | None = None) -> EmbeddingProvider:
         """Get an embedding provider."""
@@ -155,28 +241,50 @@ class TaskRouter:
         if has_image:
             return TaskType.VISION
 
-        q = query.lower()
-
-        # Code/script indicators
-        code_indicators = [
-            "deobfuscate", "decode", "powershell", "script", "base64",
-            "command line", "cmdline", "commandline", "obfuscated",
-            "malware", "shellcode", "vbs", "vbscript", "batch",
-            "python script", "code review", "reverse engineer",
-        ]
-        if any(ind in q for ind in code_indicators):
-            return TaskType.CODE_ANALYSIS
-
-        # Deep analysis indicators
-        deep_indicators = [
-            "deep analysis", "detailed", "comprehensive", "thorough",
-            "investigate", "root cause", "advanced", "explain in detail",
-            "full analysis", "forensic",
-        ]
-        if any(ind in q for ind in deep_indicators):
-            return TaskType.DEEP_ANALYSIS
-
-        return TaskType.QUICK_CHAT
+        return _classify_text(query.lower())
+
+
+# ── Keyword classification ────────────────────────────────────────────
+
+# Code/script indicators (checked first)
+_CODE_INDICATORS = (
+    "deobfuscate", "decode", "powershell", "script", "base64",
+    "command line", "cmdline", "commandline", "obfuscated",
+    "malware", "shellcode", "vbs", "vbscript", "batch",
+    "python script", "code review", "reverse engineer",
+)
+
+# Deep analysis indicators
+_DEEP_INDICATORS = (
+    "deep analysis", "detailed", "comprehensive", "thorough",
+    "investigate", "root cause", "advanced", "explain in detail",
+    "full analysis", "forensic",
+)
+
+# Keyword → task type.  Code indicators come first so they win both in the
+# alternation (same start position) and in precedence (checked below).
+_INDICATOR_TYPES: dict[str, TaskType] = {
+    **dict.fromkeys(_CODE_INDICATORS, TaskType.CODE_ANALYSIS),
+    **dict.fromkeys(_DEEP_INDICATORS, TaskType.DEEP_ANALYSIS),
+}
+
+# One pass over the query; the zero-width lookahead reports overlapping
+# matches so a deep keyword can never hide a code keyword.
+_INDICATOR_RE = re.compile(
+    "(?=(" + "|".join(map(re.escape, _INDICATOR_TYPES)) + "))"
+)
+
+
+@lru_cache(maxsize=4096)
+def _classify_text(q: str) -> TaskType:
+    """Classify a lower-cased query by substring keyword match."""
+    result = TaskType.QUICK_CHAT
+    for m in _INDICATOR_RE.finditer(q):
+        task_type = _INDICATOR_TYPES[m.group(1)]
+        if task_type is TaskType.CODE_ANALYSIS:
+            return task_type
+        result = task_type
+    return result
 
 
 # Singleton
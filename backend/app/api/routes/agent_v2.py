@@ -4,41 +4,46 @@ Supports quick, deep, and debate modes with streaming.
 Conversations are persisted to the database.
 """
 
-import json
+import asyncio
 import logging
 import re
 import time
+import uuid
 from collections import Counter
+from functools import cache, lru_cache
+from typing import AsyncIterator, Callable
 from urllib.parse import urlparse
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import StreamingResponse
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+
+try:
+    from fastapi.sse import EventSourceResponse, ServerSentEvent
+except ImportError:  # FastAPI < 0.135: fall back to hand-framed StreamingResponse
+    EventSourceResponse = ServerSentEvent = None
 from pydantic import BaseModel, Field
-from sqlalchemy import select
+from sqlalchemy import Row, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.db import get_db
-from app.db.models import Conversation, Message, Dataset, KeywordTheme
+from app.db.models import Conversation, Message, Dataset, KeywordTheme, _utcnow
 from app.agents.core_v2 import ThreatHuntAgent, AgentContext, AgentResponse, Perspective
 from app.agents.providers_v2 import check_all_nodes
 from app.agents.registry import registry
+from app.services.cache import LRUCache
 from app.services.sans_rag import sans_rag
-from app.services.scanner import KeywordScanner
+from app.services.scanner import KeywordScanner, keyword_scan_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/agent", tags=["agent"])
 
-# Global agent instance
-_agent: ThreatHuntAgent | None = None
-
 
-def get_agent() -> ThreatHuntAgent:
-    global _agent
-    if _agent is None:
-        _agent = ThreatHuntAgent()
-    return _agent
+def get_agent(request: Request) -> ThreatHuntAgent:
+    """Dependency returning the agent built once in the app lifespan."""
+    return request.app.state.agent
 
 
 #  Request / Response models 
@@ -73,60 +78,127 @@ class AssistResponseModel(BaseModel):
     model_used: str = ""
     node_used: str = ""
     latency_ms: int = 0
-    perspectives: list[dict] | None = None
+    perspectives: list[Perspective] | None = None
     execution: dict | None = None
     conversation_id: str | None = None
 
 
-POLICY_THEME_NAMES = {"Adult Content", "Gambling", "Downloads / Piracy"}
-POLICY_QUERY_TERMS = {
+POLICY_THEME_NAMES = frozenset({"Adult Content", "Gambling", "Downloads / Piracy"})
+_POLICY_THEME_LIST = sorted(POLICY_THEME_NAMES)
+POLICY_QUERY_TERMS = frozenset({
     "policy", "violating", "violation", "browser history", "web history",
     "domain", "domains", "adult", "gambling", "piracy", "aup",
-}
-WEB_DATASET_HINTS = {
+})
+WEB_DATASET_HINTS = frozenset({
     "web", "history", "browser", "url", "visited_url", "domain", "title",
-}
+})
 
 
 def _is_policy_domain_query(query: str) -> bool:
-    q = (query or "").lower()
+    return _is_policy_text((query or "").lower())
+
+
+@lru_cache(maxsize=4096)
+def _is_policy_text(q: str) -> bool:
+    # Terms overlap ("domain" / "domains"), so each one is tested on its own
+    # rather than through a single alternation regex that would match one.
     if not q:
         return False
     score = sum(1 for t in POLICY_QUERY_TERMS if t in q)
     return score >= 2 and ("domain" in q or "history" in q or "policy" in q)
 
+
 def _should_execute_policy_scan(request: AssistRequest) -> bool:
-    pref = (request.execution_preference or "auto").strip().lower()
+    return _policy_scan_decision(request.query, request.execution_preference)
+
+
+@lru_cache(maxsize=4096)
+def _policy_scan_decision(query: str, execution_preference: str | None) -> bool:
+    pref = (execution_preference or "auto").strip().lower()
     if pref == "off":
         return False
     if pref == "force":
         return True
-    return _is_policy_domain_query(request.query)
+    return _is_policy_domain_query(query)
+
+
+_DOMAIN_RE = re.compile(r"([a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}")
 
 
 def _extract_domain(value: str | None) -> str | None:
+    # Called once per scan hit, so cheap substring checks gate the parsers.
     if not value:
         return None
     text = value.strip()
     if not text:
         return None
 
-    try:
-        parsed = urlparse(text)
-        if parsed.netloc:
-            return parsed.netloc.lower()
-    except Exception:
-        pass
+    if "://" in text or text.startswith("//"):
+        try:
+            parsed = urlparse(text)
+            if parsed.netloc:
+                return parsed.netloc.lower()
+        except Exception:
+            pass
 
-    m = re.search(r"([a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}", text)
+    if "." not in text:
+        return None
+    m = _DOMAIN_RE.search(text)
     return m.group(0).lower() if m else None
 
 
-def _dataset_score(ds: Dataset) -> int:
+# Lowercased (column names, normalized column values) per dataset.  Only
+# datasets that finished processing are cached: their schema is final.
+_column_sets = LRUCache(maxsize=1024)
+_FINAL_DATASET_STATUSES = frozenset({"completed", "ready"})
+_NO_COLUMNS: tuple[frozenset[str], frozenset[str]] = (frozenset(), frozenset())
+
+
+def _column_sets_for(
+    ds_id: str,
+    processing_status: str | None,
+    column_schema: dict | None,
+    normalized_columns: dict | None,
+) -> tuple[frozenset[str], frozenset[str]]:
+    sets = (
+        frozenset(c.lower() for c in (column_schema or {}).keys()),
+        frozenset(str(v).lower() for v in (normalized_columns or {}).values()),
+    )
+    if processing_status in _FINAL_DATASET_STATUSES:
+        _column_sets.put(ds_id, sets)
+    return sets
+
+
+async def _candidate_column_sets(
+    db: AsyncSession, candidates: list[Row],
+) -> dict[str, tuple[frozenset[str], frozenset[str]]]:
+    """Column sets per candidate id; JSON schemas are fetched only on a cache miss."""
+    out: dict[str, tuple[frozenset[str], frozenset[str]]] = {}
+    missing: dict[str, str | None] = {}
+    for c in candidates:
+        cached = _column_sets.get(c.id)
+        if cached is not None:
+            out[c.id] = cached
+        else:
+            missing[c.id] = c.processing_status
+    if missing:
+        result = await db.execute(
+            select(Dataset.id, Dataset.column_schema, Dataset.normalized_columns)
+            .where(Dataset.id.in_(list(missing)))
+        )
+        for r in result.all():
+            out[r.id] = _column_sets_for(
+                r.id, missing[r.id], r.column_schema, r.normalized_columns,
+            )
+    return out
+
+
+def _dataset_score(
+    ds: Row, column_sets: tuple[frozenset[str], frozenset[str]],
+) -> int:
     score = 0
     name = (ds.name or "").lower()
-    cols_l = {c.lower() for c in (ds.column_schema or {}).keys()}
-    norm_vals_l = {str(v).lower() for v in (ds.normalized_columns or {}).values()}
+    cols_l, norm_vals_l = column_sets
 
     for h in WEB_DATASET_HINTS:
         if h in name:
@@ -148,31 +220,64 @@ def _dataset_score(ds: Dataset) -> int:
     return score
 
 
-async def _run_policy_domain_execution(request: AssistRequest, db: AsyncSession) -> dict:
-    scanner = KeywordScanner(db)
+# (loaded_at, keyword_scan_cache generation, theme ids, theme names)
+_policy_themes: tuple[float, int, list[str], list[str]] | None = None
+POLICY_THEME_TTL = 300.0
+
+
+async def _load_policy_themes(db: AsyncSession) -> tuple[list[str], list[str]]:
+    """Return ``(ids, names)`` of enabled policy themes, cached for 5 minutes.
+
+    Theme and keyword edits clear ``keyword_scan_cache``, which bumps its
+    generation and so invalidates this cache as well.
+    """
+    global _policy_themes
+    now = time.monotonic()
+    generation = keyword_scan_cache.generation
+    cached = _policy_themes
+    if cached and cached[1] == generation and now - cached[0] < POLICY_THEME_TTL:
+        return cached[2], cached[3]
 
     theme_result = await db.execute(
-        select(KeywordTheme).where(
+        select(KeywordTheme.id, KeywordTheme.name).where(
             KeywordTheme.enabled == True,  # noqa: E712
-            KeywordTheme.name.in_(list(POLICY_THEME_NAMES)),
+            KeywordTheme.name.in_(_POLICY_THEME_LIST),
         )
     )
-    themes = list(theme_result.scalars().all())
-    theme_ids = [t.id for t in themes]
-    theme_names = [t.name for t in themes] or sorted(POLICY_THEME_NAMES)
+    rows = theme_result.all()
+    theme_ids = [r.id for r in rows]
+    theme_names = [r.name for r in rows]
+    _policy_themes = (now, generation, theme_ids, theme_names)
+    return theme_ids, theme_names
 
-    ds_query = select(Dataset).where(Dataset.processing_status.in_(["completed", "ready", "processing"]))
+
+async def _run_policy_domain_execution(
+    request: AssistRequest,
+    db: AsyncSession,
+    on_progress: Callable[[dict], None] | None = None,
+) -> dict:
+    scanner = KeywordScanner(db)
+
+    theme_ids, theme_names = await _load_policy_themes(db)
+    theme_names = theme_names or _POLICY_THEME_LIST
+
+    # Only the scalar fields are loaded here; the JSON schema columns are
+    # fetched separately, and only for datasets not already in the cache.
+    ds_query = select(
+        Dataset.id, Dataset.name, Dataset.row_count, Dataset.processing_status,
+    ).where(Dataset.processing_status.in_(["completed", "ready", "processing"]))
     if request.hunt_id:
         ds_query = ds_query.where(Dataset.hunt_id == request.hunt_id)
+    # Name filtering happens in SQL so non-matching datasets are never loaded.
+    needle = (request.dataset_name or "").lower().strip()
+    if needle:
+        ds_query = ds_query.where(func.lower(Dataset.name).contains(needle, autoescape=True))
     ds_result = await db.execute(ds_query)
-    candidates = list(ds_result.scalars().all())
-
-    if request.dataset_name:
-        needle = request.dataset_name.lower().strip()
-        candidates = [d for d in candidates if needle in (d.name or "").lower()]
+    candidates = list(ds_result.all())
+    column_sets = await _candidate_column_sets(db, candidates)
 
     scored = sorted(
-        ((d, _dataset_score(d)) for d in candidates),
+        ((d, _dataset_score(d, column_sets.get(d.id, _NO_COLUMNS))) for d in candidates),
         key=lambda x: x[1],
         reverse=True,
     )
@@ -193,30 +298,43 @@ async def _run_policy_domain_execution(request: AssistRequest, db: AsyncSession)
             "note": "No suitable browser/web-history datasets found in current scope.",
         }
 
+    if on_progress is not None:
+        on_progress({
+            "type": "scan_started",
+            "themes": theme_names,
+            "dataset_names": [d.name for d in selected],
+        })
+
+    def _dataset_scanned(p: dict) -> None:
+        on_progress({
+            "type": "dataset_scanned",
+            "dataset_name": p["dataset_name"],
+            "rows_scanned": p["rows_scanned"],
+            "partial_hit_count": p["hits"],
+        })
+
     result = await scanner.scan(
         dataset_ids=dataset_ids,
         theme_ids=theme_ids or None,
         scan_hunts=False,
         scan_annotations=False,
         scan_messages=False,
+        on_progress=_dataset_scanned if on_progress is not None else None,
     )
     hits = result.get("hits", [])
 
-    user_host_counter = Counter()
-    domain_counter = Counter()
-
-    for h in hits:
-        user = h.get("username") or "(unknown-user)"
-        host = h.get("hostname") or "(unknown-host)"
-        user_host_counter[f"{user}|{host}"] += 1
-
-        dom = _extract_domain(h.get("matched_value"))
-        if dom:
-            domain_counter[dom] += 1
+    # Tuple keys: the "user|host" label is formatted for the top 10 only.
+    user_host_counter = Counter(
+        (h.get("username") or "(unknown-user)", h.get("hostname") or "(unknown-host)")
+        for h in hits
+    )
+    domain_counter = Counter(
+        filter(None, (_extract_domain(h.get("matched_value")) for h in hits))
+    )
 
     top_user_hosts = [
-        {"user_host": k, "count": v}
-        for k, v in user_host_counter.most_common(10)
+        {"user_host": f"{user}|{host}", "count": v}
+        for (user, host), v in user_host_counter.most_common(10)
     ]
     top_domains = [
         {"domain": k, "count": v}
@@ -233,10 +351,85 @@ async def _run_policy_domain_execution(request: AssistRequest, db: AsyncSession)
         "rows_scanned": int(result.get("rows_scanned", 0)),
         "top_user_hosts": top_user_hosts,
         "top_domains": top_domains,
-        "sample_hits": hits[:20],
+        # References only: the full row is available from the dataset rows
+        # endpoint, so the matched cell text is not echoed back here.
+        "sample_hits": [
+            {
+                "source_id": h.get("source_id"),
+                "dataset_name": h.get("dataset_name"),
+                "row_index": h.get("row_index"),
+                "theme_name": h.get("theme_name"),
+                "keyword": h.get("keyword"),
+                "username": h.get("username"),
+                "hostname": h.get("hostname"),
+                "domain": _extract_domain(h.get("matched_value")),
+            }
+            for h in hits[:20]
+        ],
     }
 
 
+def _policy_scan_response(
+    request: AssistRequest, exec_payload: dict, latency_ms: int,
+) -> AssistResponseModel:
+    """Build the /assist response for a completed policy-domain scan."""
+    policy_hits = exec_payload.get("policy_hits", 0)
+    datasets_scanned = exec_payload.get("datasets_scanned", 0)
+
+    if policy_hits > 0:
+        guidance = (
+            f"Policy-violation scan complete: {policy_hits} hits across "
+            f"{datasets_scanned} dataset(s). Top user/host pairs and domains are included "
+            f"in execution results for triage."
+        )
+        confidence = 0.95
+        caveats = "Keyword-based matching can include false positives; validate with full URL context."
+    else:
+        guidance = (
+            f"No policy-violation hits found in current scope "
+            f"({datasets_scanned} dataset(s) scanned)."
+        )
+        confidence = 0.9
+        caveats = exec_payload.get("note") or "Try expanding scope to additional hunts/datasets."
+
+    return AssistResponseModel(
+        guidance=guidance,
+        confidence=confidence,
+        suggested_pivots=["username", "hostname", "domain", "dataset_name"],
+        suggested_filters=[
+            "theme_name in ['Adult Content','Gambling','Downloads / Piracy']",
+            "username != null",
+            "hostname != null",
+        ],
+        caveats=caveats,
+        reasoning=(
+            "Intent matched policy-domain investigation; executed local keyword scan pipeline."
+            if _is_policy_domain_query(request.query)
+            else "Execution mode was forced by user preference; ran policy-domain scan pipeline."
+        ),
+        sans_references=["SANS FOR508", "SANS SEC504"],
+        model_used="execution:keyword_scanner",
+        node_used="local",
+        latency_ms=latency_ms,
+        execution=exec_payload,
+    )
+
+
+def _as_agent_response(response: AssistResponseModel) -> AgentResponse:
+    return AgentResponse(
+        guidance=response.guidance,
+        confidence=response.confidence,
+        suggested_pivots=response.suggested_pivots,
+        suggested_filters=response.suggested_filters,
+        caveats=response.caveats,
+        reasoning=response.reasoning,
+        sans_references=response.sans_references,
+        model_used=response.model_used,
+        node_used=response.node_used,
+        latency_ms=response.latency_ms,
+    )
+
+
 #  Routes 
 
 
@@ -250,7 +443,10 @@ async def _run_policy_domain_execution(request: AssistRequest, db: AsyncSession)
 async def agent_assist(
     request: AssistRequest,
     db: AsyncSession = Depends(get_db),
+    agent: ThreatHuntAgent = Depends(get_agent),
 ) -> AssistResponseModel:
+    # Model instances are serialized straight to JSON bytes by Pydantic;
+    # an instance of the response model itself is not re-validated.
     try:
         # Deterministic execution mode for policy-domain investigations.
         if _should_execute_policy_scan(request):
@@ -258,71 +454,13 @@ async def agent_assist(
             exec_payload = await _run_policy_domain_execution(request, db)
             latency_ms = int((time.monotonic() - t0) * 1000)
 
-            policy_hits = exec_payload.get("policy_hits", 0)
-            datasets_scanned = exec_payload.get("datasets_scanned", 0)
-
-            if policy_hits > 0:
-                guidance = (
-                    f"Policy-violation scan complete: {policy_hits} hits across "
-                    f"{datasets_scanned} dataset(s). Top user/host pairs and domains are included "
-                    f"in execution results for triage."
-                )
-                confidence = 0.95
-                caveats = "Keyword-based matching can include false positives; validate with full URL context."
-            else:
-                guidance = (
-                    f"No policy-violation hits found in current scope "
-                    f"({datasets_scanned} dataset(s) scanned)."
-                )
-                confidence = 0.9
-                caveats = exec_payload.get("note") or "Try expanding scope to additional hunts/datasets."
-
-            response = AssistResponseModel(
-                guidance=guidance,
-                confidence=confidence,
-                suggested_pivots=["username", "hostname", "domain", "dataset_name"],
-                suggested_filters=[
-                    "theme_name in ['Adult Content','Gambling','Downloads / Piracy']",
-                    "username != null",
-                    "hostname != null",
-                ],
-                caveats=caveats,
-                reasoning=(
-                    "Intent matched policy-domain investigation; executed local keyword scan pipeline."
-                    if _is_policy_domain_query(request.query)
-                    else "Execution mode was forced by user preference; ran policy-domain scan pipeline."
-                ),
-                sans_references=["SANS FOR508", "SANS SEC504"],
-                model_used="execution:keyword_scanner",
-                node_used="local",
-                latency_ms=latency_ms,
-                execution=exec_payload,
+            response = _policy_scan_response(request, exec_payload, latency_ms)
+            response.conversation_id = await _persist_exchange(
+                db, request, _as_agent_response(response),
             )
 
-            conv_id = request.conversation_id
-            if conv_id or request.hunt_id:
-                conv_id = await _persist_conversation(
-                    db,
-                    conv_id,
-                    request,
-                    AgentResponse(
-                        guidance=response.guidance,
-                        confidence=response.confidence,
-                        suggested_pivots=response.suggested_pivots,
-                        suggested_filters=response.suggested_filters,
-                        caveats=response.caveats,
-                        reasoning=response.reasoning,
-                        sans_references=response.sans_references,
-                        model_used=response.model_used,
-                        node_used=response.node_used,
-                        latency_ms=response.latency_ms,
-                    ),
-                )
-                response.conversation_id = conv_id
-
             return response
 
-        agent = get_agent()
         context = AgentContext(
             query=request.query,
             dataset_name=request.dataset_name,
@@ -341,13 +479,11 @@ async def agent_assist(
         response = await agent.assist(context)
 
         # Persist conversation
-        conv_id = request.conversation_id
-        if conv_id or request.hunt_id:
-            conv_id = await _persist_conversation(
-                db, conv_id, request, response
-            )
+        conv_id = await _persist_exchange(db, request, response)
 
-        return AssistResponseModel(
+        # Fields come from the agent's own validated AgentResponse, so skip
+        # re-validating them.
+        return AssistResponseModel.model_construct(
             guidance=response.guidance,
             confidence=response.confidence,
             suggested_pivots=response.suggested_pivots,
@@ -358,16 +494,7 @@ async def agent_assist(
             model_used=response.model_used,
             node_used=response.node_used,
             latency_ms=response.latency_ms,
-            perspectives=[
-                {
-                    "role": p.role,
-                    "content": p.content,
-                    "model_used": p.model_used,
-                    "node_used": p.node_used,
-                    "latency_ms": p.latency_ms,
-                }
-                for p in response.perspectives
-            ] if response.perspectives else None,
+            perspectives=response.perspectives or None,
             execution=None,
             conversation_id=conv_id,
         )
@@ -377,14 +504,8 @@ async def agent_assist(
         raise HTTPException(status_code=500, detail=f"Agent error: {str(e)}")
 
 
-@router.post(
-    "/assist/stream",
-    summary="Stream agent response",
-    description="Stream tokens via SSE for real-time display.",
-)
-async def agent_assist_stream(request: AssistRequest):
-    agent = get_agent()
-    context = AgentContext(
+def _stream_context(request: AssistRequest) -> AgentContext:
+    return AgentContext(
         query=request.query,
         dataset_name=request.dataset_name,
         artifact_type=request.artifact_type,
@@ -394,20 +515,155 @@ async def agent_assist_stream(request: AssistRequest):
         mode="quick",  # streaming only supports quick mode
     )
 
-    async def _stream():
-        async for token in agent.assist_stream(context):
-            yield f"data: {json.dumps({'token': token})}\n\n"
-        yield "data: [DONE]\n\n"
-
-    return StreamingResponse(
-        _stream(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
+
+# Tokens are coalesced upstream so each SSE frame (one ASGI send) carries
+# ~8 tokens, flushed after at most 20ms so typing still looks live.
+_STREAM_CHUNK_WINDOW_MS = 20
+_STREAM_CHUNK_MAX_TOKENS = 8
+
+# Token frames have a fixed single-field shape, so only the token itself is
+# JSON-encoded and spliced between these.
+_TOKEN_FRAME_PREFIX = b'data: {"token":'
+_TOKEN_FRAME_SUFFIX = b"}\n\n"
+
+
+def _stream_tokens(
+    request: AssistRequest, agent: ThreatHuntAgent,
+) -> AsyncIterator[str]:
+    return agent.assist_stream(
+        _stream_context(request),
+        chunk_window_ms=_STREAM_CHUNK_WINDOW_MS,
+        chunk_max_tokens=_STREAM_CHUNK_MAX_TOKENS,
+    )
+
+
+async def _policy_scan_events(
+    request: AssistRequest, db: AsyncSession,
+) -> AsyncIterator[dict]:
+    """Run a policy-domain scan, yielding progress events then the result.
+
+    Events are ``scan_started``, one ``dataset_scanned`` per dataset (with
+    the running ``partial_hit_count``), then ``result`` carrying the same
+    body ``/assist`` returns, or ``error``.
+    """
+    queue: asyncio.Queue[dict | None] = asyncio.Queue()
+
+    async def _run() -> tuple[dict, int]:
+        t0 = time.monotonic()
+        payload = await _run_policy_domain_execution(request, db, queue.put_nowait)
+        return payload, int((time.monotonic() - t0) * 1000)
+
+    task = asyncio.create_task(_run())
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    try:
+        while (event := await queue.get()) is not None:
+            yield event
+        exec_payload, latency_ms = await task
+    except Exception as e:
+        logger.exception(f"Policy scan error: {e}")
+        # Details stay in the log: driver errors can carry SQL and row data.
+        yield {"type": "error", "detail": "Policy scan failed"}
+        return
+    finally:
+        task.cancel()
+
+    response = _policy_scan_response(request, exec_payload, latency_ms)
+    response.conversation_id = await _persist_exchange(
+        db, request, _as_agent_response(response),
     )
+    yield {"type": "result", "response": response.model_dump()}
+
+
+if EventSourceResponse is not None:
+    # Terminator the frontend watches for; sent verbatim, not JSON-encoded.
+    _DONE_EVENT = ServerSentEvent(raw_data="[DONE]")
+
+    @router.post(
+        "/assist/stream",
+        summary="Stream agent response",
+        description="Stream tokens via SSE for real-time display.",
+        response_class=EventSourceResponse,
+    )
+    async def agent_assist_stream(
+        request: AssistRequest, agent: ThreatHuntAgent = Depends(get_agent),
+    ):
+        # FastAPI frames each yielded item as an SSE event, sets the
+        # no-cache/no-buffering headers and sends keep-alive pings.  Tokens
+        # go out as pre-rendered raw_data, skipping its per-item
+        # jsonable_encoder + json.dumps pass and the event model validation.
+        async for token in _stream_tokens(request, agent):
+            yield ServerSentEvent.model_construct(
+                raw_data='{"token":' + orjson.dumps(token).decode() + "}"
+            )
+        yield _DONE_EVENT
+
+    @router.post(
+        "/assist/policy-scan/stream",
+        summary="Stream a policy-domain scan",
+        description="Run the policy-violation keyword scan, streaming per-dataset "
+        "progress before the final /assist-shaped result.",
+        response_class=EventSourceResponse,
+    )
+    async def agent_policy_scan_stream(
+        request: AssistRequest, db: AsyncSession = Depends(get_db),
+    ):
+        async for event in _policy_scan_events(request, db):
+            yield event
+        yield _DONE_EVENT
+
+else:
+
+    @router.post(
+        "/assist/stream",
+        summary="Stream agent response",
+        description="Stream tokens via SSE for real-time display.",
+    )
+    async def agent_assist_stream(
+        request: AssistRequest, agent: ThreatHuntAgent = Depends(get_agent),
+    ):
+        tokens = _stream_tokens(request, agent)
+
+        # Frames are emitted as bytes so Starlette writes them without re-encoding.
+        # _stream must stay an async generator: Starlette iterates sync ones in
+        # a threadpool, one hop per frame.
+        async def _stream() -> AsyncIterator[bytes]:
+            async for token in tokens:
+                yield _TOKEN_FRAME_PREFIX + orjson.dumps(token) + _TOKEN_FRAME_SUFFIX
+            yield b"data: [DONE]\n\n"
+
+        return StreamingResponse(
+            _stream(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "X-Accel-Buffering": "no",
+            },
+        )
+
+    @router.post(
+        "/assist/policy-scan/stream",
+        summary="Stream a policy-domain scan",
+        description="Run the policy-violation keyword scan, streaming per-dataset "
+        "progress before the final /assist-shaped result.",
+    )
+    async def agent_policy_scan_stream(
+        request: AssistRequest, db: AsyncSession = Depends(get_db),
+    ):
+        async def _stream() -> AsyncIterator[bytes]:
+            async for event in _policy_scan_events(request, db):
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
+            yield b"data: [DONE]\n\n"
+
+        return StreamingResponse(
+            _stream(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "X-Accel-Buffering": "no",
+            },
+        )
 
 
 @router.get(
@@ -441,16 +697,38 @@ async def agent_health() -> dict:
     summary="List all available models",
     description="Returns the full model registry with capabilities and node assignments.",
 )
-async def list_models():
-    return {
+async def list_models() -> Response:
+    return Response(_models_body(), media_type="application/json")
+
+
+@cache
+def _models_body() -> bytes:
+    # The registry is fixed at import, so the listing is encoded only once.
+    return orjson.dumps({
         "models": registry.to_dict(),
         "total": len(registry.models),
-    }
+    })
 
 
 #  Conversation persistence 
 
 
+async def _persist_exchange(
+    db: AsyncSession,
+    request: AssistRequest,
+    response: AgentResponse,
+) -> str | None:
+    """Persist the exchange when the request is tied to a conversation or hunt.
+
+    Runs on the request's session before the response goes out, so the
+    conversation is committed before the client can send a follow-up
+    naming its id.  Returns the conversation id, or None when untracked.
+    """
+    if not (request.conversation_id or request.hunt_id):
+        return None
+    return await _persist_conversation(db, request.conversation_id, request, response)
+
+
 async def _persist_conversation(
     db: AsyncSession,
     conversation_id: str | None,
@@ -459,34 +737,35 @@ async def _persist_conversation(
 ) -> str:
     """Save user message and agent response to the database."""
     if conversation_id:
-        # Find existing conversation
-        from sqlalchemy import select
-        result = await db.execute(
-            select(Conversation).where(Conversation.id == conversation_id)
+        # Touch the existing conversation instead of loading it (and its
+        # selectin-loaded messages); create it only when no row matched.
+        touched = await db.scalar(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(updated_at=_utcnow())
+            .returning(Conversation.id)
         )
-        conv = result.scalar_one_or_none()
-        if not conv:
-            conv = Conversation(id=conversation_id, hunt_id=request.hunt_id)
-            db.add(conv)
+        conv = None if touched else Conversation(id=conversation_id, hunt_id=request.hunt_id)
     else:
+        # Assign the id up front so the messages below can reference it
+        # without an extra flush round-trip.
         conv = Conversation(
+            id=uuid.uuid4().hex,
             title=request.query[:100],
             hunt_id=request.hunt_id,
         )
-        db.add(conv)
-        await db.flush()
+    conv_id = conv.id if conv else conversation_id
 
     # User message
     user_msg = Message(
-        conversation_id=conv.id,
+        conversation_id=conv_id,
         role="user",
         content=request.query,
     )
-    db.add(user_msg)
 
     # Agent message
     agent_msg = Message(
-        conversation_id=conv.id,
+        conversation_id=conv_id,
         role="agent",
         content=response.guidance,
         model_used=response.model_used,
@@ -499,8 +778,9 @@ async def _persist_conversation(
             "sans_refs": response.sans_references,
         },
     )
-    db.add(agent_msg)
+    # Conversation (when new) and both messages go out in one flush
+    db.add_all([conv, user_msg, agent_msg] if conv else [user_msg, agent_msg])
     await db.flush()
 
-    return conv.id
+    return conv_id
 
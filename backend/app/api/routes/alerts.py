@@ -1,11 +1,16 @@
 """API routes for alerts — CRUD, analyze triggers, and alert rules."""
 
 import logging
-from typing import Optional
+from collections import Counter
+from functools import lru_cache
+from operator import attrgetter
+from typing import AsyncIterator, Optional
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy import select, func, desc
+from sqlalchemy import bindparam, case, delete, desc, func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db
@@ -17,7 +22,7 @@ from app.services.analyzers import (
     run_all_analyzers,
     AlertCandidate,
 )
-from app.services.process_tree import _fetch_rows
+from app.services.process_tree import _fetch_row_data
 
 logger = logging.getLogger(__name__)
 
@@ -64,42 +69,24 @@ class AnalyzeRequest(BaseModel):
 # ── Helpers ───────────────────────────────────────────────────────────
 
 
+# Column names are resolved once; attrgetter then fetches every attribute
+# of a row in a single C-level call.  Datetimes are left as objects: the
+# JSON encoders (FastAPI's and orjson for streamed lists) format them.
+_ALERT_COLUMNS = tuple(Alert.__table__.columns.keys())
+_RULE_COLUMNS = tuple(AlertRule.__table__.columns.keys())
+_alert_values = attrgetter(*_ALERT_COLUMNS)
+_rule_values = attrgetter(*_RULE_COLUMNS)
+
+
 def _alert_to_dict(a: Alert) -> dict:
-    return {
-        "id": a.id,
-        "title": a.title,
-        "description": a.description,
-        "severity": a.severity,
-        "status": a.status,
-        "analyzer": a.analyzer,
-        "score": a.score,
-        "evidence": a.evidence or [],
-        "mitre_technique": a.mitre_technique,
-        "tags": a.tags or [],
-        "hunt_id": a.hunt_id,
-        "dataset_id": a.dataset_id,
-        "case_id": a.case_id,
-        "assignee": a.assignee,
-        "acknowledged_at": a.acknowledged_at.isoformat() if a.acknowledged_at else None,
-        "resolved_at": a.resolved_at.isoformat() if a.resolved_at else None,
-        "created_at": a.created_at.isoformat() if a.created_at else None,
-        "updated_at": a.updated_at.isoformat() if a.updated_at else None,
-    }
+    d = dict(zip(_ALERT_COLUMNS, _alert_values(a)))
+    d["evidence"] = d["evidence"] or []
+    d["tags"] = d["tags"] or []
+    return d
 
 
 def _rule_to_dict(r: AlertRule) -> dict:
-    return {
-        "id": r.id,
-        "name": r.name,
-        "description": r.description,
-        "analyzer": r.analyzer,
-        "config": r.config,
-        "severity_override": r.severity_override,
-        "enabled": r.enabled,
-        "hunt_id": r.hunt_id,
-        "created_at": r.created_at.isoformat() if r.created_at else None,
-        "updated_at": r.updated_at.isoformat() if r.updated_at else None,
-    }
+    return dict(zip(_RULE_COLUMNS, _rule_values(r)))
 
 
 # ── Alert CRUD ────────────────────────────────────────────────────────
@@ -114,77 +101,124 @@ async def list_alerts(
     dataset_id: str | None = Query(None),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    stream: bool = Query(False, description="Stream the page instead of buffering it"),
     db: AsyncSession = Depends(get_db),
 ):
-    stmt = select(Alert)
-    count_stmt = select(func.count(Alert.id))
-    if status:
-        stmt = stmt.where(Alert.status == status)
-        count_stmt = count_stmt.where(Alert.status == status)
-    if severity:
-        stmt = stmt.where(Alert.severity == severity)
-        count_stmt = count_stmt.where(Alert.severity == severity)
-    if analyzer:
-        stmt = stmt.where(Alert.analyzer == analyzer)
-        count_stmt = count_stmt.where(Alert.analyzer == analyzer)
-    if hunt_id:
-        stmt = stmt.where(Alert.hunt_id == hunt_id)
-        count_stmt = count_stmt.where(Alert.hunt_id == hunt_id)
-    if dataset_id:
-        stmt = stmt.where(Alert.dataset_id == dataset_id)
-        count_stmt = count_stmt.where(Alert.dataset_id == dataset_id)
-
-    total = (await db.execute(count_stmt)).scalar() or 0
-    results = (await db.execute(
-        stmt.order_by(desc(Alert.score), desc(Alert.created_at)).offset(offset).limit(limit)
-    )).scalars().all()
+    params = {
+        name: value
+        for name, value in (
+            ("status", status), ("severity", severity), ("analyzer", analyzer),
+            ("hunt_id", hunt_id), ("dataset_id", dataset_id),
+        )
+        if value
+    }
+    keys = tuple(params)
+    stmt = _list_alerts_stmt(keys)
+    params.update(offset=offset, limit=limit)
+    if stream:
+        return StreamingResponse(_stream_alerts(db, stmt, params), media_type="application/json")
+
+    rows = (await db.execute(stmt, params)).all()
+    results = [a for a, _ in rows]
+    if rows:
+        total = rows[0].total
+    elif offset:
+        # Paged past the end: there is no row to carry the window count
+        total = (await db.execute(_count_alerts_stmt(keys), params)).scalar() or 0
+    else:
+        total = 0
 
     return {"alerts": [_alert_to_dict(a) for a in results], "total": total}
 
 
+def _alert_filters(keys: tuple[str, ...]) -> list:
+    return [getattr(Alert, key) == bindparam(key) for key in keys]
+
+
+# One statement per combination of filters (32 at most), built once with
+# bind parameters so each request only supplies values.
+@lru_cache(maxsize=None)
+def _list_alerts_stmt(keys: tuple[str, ...]):
+    # The window count rides along with the page, so one query returns both
+    return (
+        select(Alert, func.count().over().label("total"))
+        .where(*_alert_filters(keys))
+        .order_by(desc(Alert.score), desc(Alert.created_at))
+        .offset(bindparam("offset"))
+        .limit(bindparam("limit"))
+    )
+
+
+@lru_cache(maxsize=None)
+def _count_alerts_stmt(keys: tuple[str, ...]):
+    return select(func.count(Alert.id)).where(*_alert_filters(keys))
+
+
+async def _stream_alerts(
+    db: AsyncSession, stmt, params: dict,
+) -> AsyncIterator[bytes]:
+    """Emit the list_alerts body incrementally, ~100 ORM rows in memory at a time.
+
+    The total arrives with the first row, so it is written after the alerts
+    array (0 for a page past the end).
+    """
+    total = 0
+    result = await db.stream(stmt.execution_options(yield_per=100), params)
+    yield b'{"alerts":['
+    sep = b""
+    async for alert, total in result:
+        yield sep + orjson.dumps(_alert_to_dict(alert))
+        sep = b","
+    yield b'],"total":' + orjson.dumps(total) + b"}"
+
+
 @router.get("/stats", summary="Alert statistics dashboard")
 async def alert_stats(
     hunt_id: str | None = Query(None),
     db: AsyncSession = Depends(get_db),
 ):
-    """Return aggregated alert statistics."""
-    base = select(Alert)
-    if hunt_id:
-        base = base.where(Alert.hunt_id == hunt_id)
-
-    # Severity breakdown
-    sev_stmt = select(Alert.severity, func.count(Alert.id)).group_by(Alert.severity)
-    if hunt_id:
-        sev_stmt = sev_stmt.where(Alert.hunt_id == hunt_id)
-    sev_rows = (await db.execute(sev_stmt)).all()
-    severity_counts = {s: c for s, c in sev_rows}
-
-    # Status breakdown
-    status_stmt = select(Alert.status, func.count(Alert.id)).group_by(Alert.status)
-    if hunt_id:
-        status_stmt = status_stmt.where(Alert.hunt_id == hunt_id)
-    status_rows = (await db.execute(status_stmt)).all()
-    status_counts = {s: c for s, c in status_rows}
-
-    # Analyzer breakdown
-    analyzer_stmt = select(Alert.analyzer, func.count(Alert.id)).group_by(Alert.analyzer)
-    if hunt_id:
-        analyzer_stmt = analyzer_stmt.where(Alert.hunt_id == hunt_id)
-    analyzer_rows = (await db.execute(analyzer_stmt)).all()
-    analyzer_counts = {a: c for a, c in analyzer_rows}
-
-    # Top MITRE techniques
-    mitre_stmt = (
-        select(Alert.mitre_technique, func.count(Alert.id))
-        .where(Alert.mitre_technique.isnot(None))
-        .group_by(Alert.mitre_technique)
-        .order_by(desc(func.count(Alert.id)))
-        .limit(10)
-    )
-    if hunt_id:
-        mitre_stmt = mitre_stmt.where(Alert.hunt_id == hunt_id)
-    mitre_rows = (await db.execute(mitre_stmt)).all()
-    top_mitre = [{"technique": t, "count": c} for t, c in mitre_rows]
+    """Return aggregated alert statistics in a single scan of the alerts table."""
+    dims = {
+        "severity": Alert.severity,
+        "status": Alert.status,
+        "analyzer": Alert.analyzer,
+        "mitre": Alert.mitre_technique,
+    }
+    buckets: dict[str, dict] = {k: {} for k in dims}
+
+    if db.bind.dialect.name == "postgresql":
+        # GROUPING SETS yields one row per (dimension, value); GROUPING() tells
+        # which dimension a row belongs to since the other columns are NULL.
+        kind = case(
+            *((func.grouping(col) == 0, key) for key, col in list(dims.items())[:-1]),
+            else_="mitre",
+        ).label("kind")
+        stmt = select(kind, *dims.values(), func.count()).group_by(
+            func.grouping_sets(*dims.values())
+        )
+        if hunt_id:
+            stmt = stmt.where(Alert.hunt_id == hunt_id)
+        for k, severity, status, analyzer, mitre, count in (await db.execute(stmt)).all():
+            value = {"severity": severity, "status": status, "analyzer": analyzer, "mitre": mitre}[k]
+            buckets[k][value] = count
+    else:
+        # SQLite has no GROUPING SETS: group by all four once and fold in Python
+        stmt = select(*dims.values(), func.count()).group_by(*dims.values())
+        if hunt_id:
+            stmt = stmt.where(Alert.hunt_id == hunt_id)
+        for *values, count in (await db.execute(stmt)).all():
+            for key, value in zip(dims, values):
+                buckets[key][value] = buckets[key].get(value, 0) + count
+
+    severity_counts = buckets["severity"]
+    status_counts = buckets["status"]
+    analyzer_counts = buckets["analyzer"]
+    mitre_counts = sorted(
+        ((t, c) for t, c in buckets["mitre"].items() if t is not None),
+        key=lambda tc: tc[1],
+        reverse=True,
+    )[:10]
+    top_mitre = [{"technique": t, "count": c} for t, c in mitre_counts]
 
     total = sum(severity_counts.values())
 
@@ -209,36 +243,37 @@ async def get_alert(alert_id: str, db: AsyncSession = Depends(get_db)):
 async def update_alert(
     alert_id: str, body: AlertUpdate, db: AsyncSession = Depends(get_db)
 ):
-    alert = await db.get(Alert, alert_id)
+    changes = body.model_dump(exclude_none=True)
+    if not changes:
+        alert = await db.get(Alert, alert_id)
+        if not alert:
+            raise HTTPException(status_code=404, detail="Alert not found")
+        return _alert_to_dict(alert)
+
+    # Timestamps are only stamped on the first transition, so COALESCE keeps
+    # an existing value in the same statement.
+    if body.status == "acknowledged":
+        changes["acknowledged_at"] = func.coalesce(Alert.acknowledged_at, _utcnow())
+    if body.status in ("resolved", "false-positive"):
+        changes["resolved_at"] = func.coalesce(Alert.resolved_at, _utcnow())
+
+    alert = await db.scalar(
+        update(Alert).where(Alert.id == alert_id).values(**changes).returning(Alert)
+    )
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
-
-    if body.status is not None:
-        alert.status = body.status
-        if body.status == "acknowledged" and not alert.acknowledged_at:
-            alert.acknowledged_at = _utcnow()
-        if body.status in ("resolved", "false-positive") and not alert.resolved_at:
-            alert.resolved_at = _utcnow()
-    if body.severity is not None:
-        alert.severity = body.severity
-    if body.assignee is not None:
-        alert.assignee = body.assignee
-    if body.case_id is not None:
-        alert.case_id = body.case_id
-    if body.tags is not None:
-        alert.tags = body.tags
-
+    result = _alert_to_dict(alert)
     await db.commit()
-    await db.refresh(alert)
-    return _alert_to_dict(alert)
+    return result
 
 
 @router.delete("/{alert_id}", summary="Delete alert")
 async def delete_alert(alert_id: str, db: AsyncSession = Depends(get_db)):
-    alert = await db.get(Alert, alert_id)
-    if not alert:
+    deleted = await db.scalar(
+        delete(Alert).where(Alert.id == alert_id).returning(Alert.id)
+    )
+    if not deleted:
         raise HTTPException(status_code=404, detail="Alert not found")
-    await db.delete(alert)
     await db.commit()
     return {"ok": True}
 
@@ -252,16 +287,33 @@ async def bulk_update_alerts(
     status: str = Query(...),
     db: AsyncSession = Depends(get_db),
 ):
-    updated = 0
-    for aid in alert_ids:
-        alert = await db.get(Alert, aid)
-        if alert:
-            alert.status = status
-            if status == "acknowledged" and not alert.acknowledged_at:
-                alert.acknowledged_at = _utcnow()
-            if status in ("resolved", "false-positive") and not alert.resolved_at:
-                alert.resolved_at = _utcnow()
-            updated += 1
+    if not alert_ids:
+        return {"updated": 0}
+
+    result = await db.execute(
+        update(Alert)
+        .where(Alert.id.in_(alert_ids))
+        .values(status=status)
+        .execution_options(synchronize_session=False)
+    )
+    updated = result.rowcount or 0
+
+    # Stamp first-transition timestamps only where they are still unset
+    now = _utcnow()
+    if status == "acknowledged":
+        await db.execute(
+            update(Alert)
+            .where(Alert.id.in_(alert_ids), Alert.acknowledged_at.is_(None))
+            .values(acknowledged_at=now)
+            .execution_options(synchronize_session=False)
+        )
+    if status in ("resolved", "false-positive"):
+        await db.execute(
+            update(Alert)
+            .where(Alert.id.in_(alert_ids), Alert.resolved_at.is_(None))
+            .values(resolved_at=now)
+            .execution_options(synchronize_session=False)
+        )
     await db.commit()
     return {"updated": updated}
 
@@ -281,56 +333,111 @@ async def run_analysis(
     if not request.dataset_id and not request.hunt_id:
         raise HTTPException(status_code=400, detail="Provide dataset_id or hunt_id")
 
-    # Load rows
-    rows_objs = await _fetch_rows(
+    # Load rows (analyzers make several passes, so they need a list)
+    rows = await _fetch_row_data(
         db, dataset_id=request.dataset_id, hunt_id=request.hunt_id, limit=10000,
     )
-    if not rows_objs:
+    if not rows:
         raise HTTPException(status_code=404, detail="No rows found")
 
-    rows = [r.normalized_data or r.data for r in rows_objs]
-
     # Run analyzers
     candidates = await run_all_analyzers(rows, enabled=request.analyzers, config=request.config)
 
     created_alerts: list[dict] = []
     if request.auto_create and candidates:
-        for c in candidates:
-            alert = Alert(
-                id=_new_id(),
-                title=c.title,
-                description=c.description,
-                severity=c.severity,
-                analyzer=c.analyzer,
-                score=c.score,
-                evidence=c.evidence,
-                mitre_technique=c.mitre_technique,
-                tags=c.tags,
-                hunt_id=request.hunt_id,
-                dataset_id=request.dataset_id,
+        alert_rows = [
+            {
+                "id": _new_id(),
+                "title": c.title,
+                "description": c.description,
+                "severity": c.severity,
+                "analyzer": c.analyzer,
+                "score": c.score,
+                "evidence": c.evidence,
+                "mitre_technique": c.mitre_technique,
+                "tags": c.tags,
+                "hunt_id": request.hunt_id,
+                "dataset_id": request.dataset_id,
+            }
+            for c in candidates
+        ]
+        if len(alert_rows) > COPY_THRESHOLD and db.bind.dialect.name == "postgresql":
+            created_alerts = await _copy_alerts(db, alert_rows)
+        else:
+            # One executemany INSERT ... RETURNING instead of a unit-of-work flush per alert
+            inserted = await db.scalars(
+                insert(Alert)
+                .returning(Alert)
+                .execution_options(insertmanyvalues_page_size=1000),
+                alert_rows,
             )
-            db.add(alert)
-            created_alerts.append(_alert_to_dict(alert))
+            created_alerts = [_alert_to_dict(a) for a in inserted]
         await db.commit()
 
+    by_severity, by_analyzer = _count_by(candidates, "severity", "analyzer")
     return {
         "candidates_found": len(candidates),
         "alerts_created": len(created_alerts),
         "alerts": created_alerts,
         "summary": {
-            "by_severity": _count_by(candidates, "severity"),
-            "by_analyzer": _count_by(candidates, "analyzer"),
+            "by_severity": by_severity,
+            "by_analyzer": by_analyzer,
             "rows_analyzed": len(rows),
         },
     }
 
 
-def _count_by(items: list[AlertCandidate], attr: str) -> dict[str, int]:
-    counts: dict[str, int] = {}
+# Above this many alerts, PostgreSQL loads them with COPY instead of INSERT
+COPY_THRESHOLD = 100
+
+_COPY_COLUMNS = (
+    "id", "title", "description", "severity", "status", "analyzer", "score",
+    "evidence", "mitre_technique", "tags", "hunt_id", "dataset_id",
+    "created_at", "updated_at",
+)
+
+
+async def _copy_alerts(db: AsyncSession, alert_rows: list[dict]) -> list[dict]:
+    """Load alerts through asyncpg's COPY protocol (PostgreSQL only).
+
+    Column defaults are filled in here since COPY bypasses the ORM, and the
+    response dicts are synthesized from the input instead of re-selecting.
+    """
+    now = _utcnow()
+    records = []
+    created: list[dict] = []
+    for row in alert_rows:
+        full = {**row, "status": "new", "created_at": now, "updated_at": now}
+        records.append(tuple(
+            orjson.dumps(full[col]).decode() if col in ("evidence", "tags") and full[col] is not None
+            else full[col]
+            for col in _COPY_COLUMNS
+        ))
+        created.append({
+            **full,
+            "evidence": full["evidence"] or [],
+            "tags": full["tags"] or [],
+            "case_id": None,
+            "assignee": None,
+            "acknowledged_at": None,
+            "resolved_at": None,
+        })
+
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        Alert.__tablename__, records=records, columns=list(_COPY_COLUMNS),
+    )
+    return created
+
+
+def _count_by(items: list[AlertCandidate], *attrs: str) -> list[Counter]:
+    """Tally each attribute's values over *items* in a single pass."""
+    counters = [Counter() for _ in attrs]
     for item in items:
-        key = getattr(item, attr, "unknown")
-        counts[key] = counts.get(key, 0) + 1
-    return counts
+        for attr, counts in zip(attrs, counters):
+            counts[getattr(item, attr, "unknown")] += 1
+    return counters
 
 
 # ── Alert Rules CRUD ─────────────────────────────────────────────────
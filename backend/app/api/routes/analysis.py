@@ -1,24 +1,34 @@
 """API routes for process trees, storyline graphs, risk scoring, LLM analysis, timeline, and field stats."""
 
 import logging
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from fastapi.responses import StreamingResponse
+
+try:
+    from fastapi.sse import EventSourceResponse
+except ImportError:  # FastAPI < 0.135: fall back to hand-framed StreamingResponse
+    EventSourceResponse = None
 from pydantic import BaseModel, Field
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import get_db
-from app.db.repositories.datasets import DatasetRepository
+from app.db.models import Dataset
+from app.services.cache import LRUCache
 from app.services.process_tree import (
     build_process_tree,
     build_storyline,
     compute_risk_scores,
-    _fetch_rows,
+    _fetch_row_data,
 )
 from app.services.llm_analysis import (
     AnalysisRequest,
     AnalysisResult,
-    run_llm_analysis,
+    run_llm_analysis_batched,
+    run_llm_analysis_stream,
 )
 from app.services.timeline import (
     build_timeline_bins,
@@ -66,6 +76,19 @@ class RiskSummaryResponse(BaseModel):
     severity_breakdown: dict[str, int] = Field(default_factory=dict)
 
 
+# ── Dependencies ──────────────────────────────────────────────────────
+
+
+def require_scope(
+    dataset_id: str | None = Query(None, description="Dataset ID"),
+    hunt_id: str | None = Query(None, description="Hunt ID (scans all datasets in hunt)"),
+) -> tuple[str | None, str | None]:
+    """Return ``(dataset_id, hunt_id)``, requiring at least one of them."""
+    if not dataset_id and not hunt_id:
+        raise HTTPException(status_code=400, detail="Provide dataset_id or hunt_id")
+    return dataset_id, hunt_id
+
+
 # ── Routes ────────────────────────────────────────────────────────────
 
 
@@ -79,24 +102,27 @@ class RiskSummaryResponse(BaseModel):
     ),
 )
 async def get_process_tree(
-    dataset_id: str | None = Query(None, description="Dataset ID"),
-    hunt_id: str | None = Query(None, description="Hunt ID (scans all datasets in hunt)"),
+    scope: tuple[str | None, str | None] = Depends(require_scope),
     hostname: str | None = Query(None, description="Filter by hostname"),
     db: AsyncSession = Depends(get_db),
 ):
     """Return process tree(s) for a dataset or hunt."""
-    if not dataset_id and not hunt_id:
-        raise HTTPException(status_code=400, detail="Provide dataset_id or hunt_id")
+    dataset_id, hunt_id = scope
 
     trees = await build_process_tree(
         db, dataset_id=dataset_id, hunt_id=hunt_id, hostname_filter=hostname,
     )
 
-    # Count total processes recursively
-    def _count(node: dict) -> int:
-        return 1 + sum(_count(c) for c in node.get("children", []))
-
-    total = sum(_count(t) for t in trees)
+    # Count total processes with an explicit stack: deep lineages cannot hit
+    # the recursion limit and there is no per-node call or generator.
+    total = 0
+    stack = list(trees)
+    while stack:
+        node = stack.pop()
+        total += 1
+        children = node.get("children")
+        if children:
+            stack.extend(children)
 
     return ProcessTreeResponse(trees=trees, total_processes=total)
 
@@ -111,14 +137,12 @@ async def get_process_tree(
     ),
 )
 async def get_storyline(
-    dataset_id: str | None = Query(None, description="Dataset ID"),
-    hunt_id: str | None = Query(None, description="Hunt ID (scans all datasets in hunt)"),
+    scope: tuple[str | None, str | None] = Depends(require_scope),
     hostname: str | None = Query(None, description="Filter by hostname"),
     db: AsyncSession = Depends(get_db),
 ):
     """Return a storyline graph for a dataset or hunt."""
-    if not dataset_id and not hunt_id:
-        raise HTTPException(status_code=400, detail="Provide dataset_id or hunt_id")
+    dataset_id, hunt_id = scope
 
     result = await build_storyline(
         db, dataset_id=dataset_id, hunt_id=hunt_id, hostname_filter=hostname,
@@ -163,33 +187,119 @@ async def llm_analyze(
     db: AsyncSession = Depends(get_db),
 ):
     """Run LLM analysis on a dataset or hunt."""
+    rows, ds_name = await _load_analysis_rows(request, db)
+
+    # Large row sets are split into slices analyzed concurrently
+    result = await run_llm_analysis_batched(rows, request, dataset_name=ds_name)
+    return result
+
+
+_LLM_STREAM_SUMMARY = "Stream LLM-powered threat analysis on dataset"
+_LLM_STREAM_DESCRIPTION = (
+    "Single-call analysis of the loaded rows (no slicing, unlike "
+    "/llm-analyze on large row sets), streamed as SSE: status events, "
+    "token events as the model decodes, then a done event with the "
+    "parsed result."
+)
+
+
+async def _analysis_input(
+    request: AnalysisRequest,
+    db: AsyncSession = Depends(get_db),
+) -> tuple[list[dict], str]:
+    # A dependency, so 400/404 are raised before the event stream starts.
+    return await _load_analysis_rows(request, db)
+
+
+if EventSourceResponse is not None:
+
+    @router.post(
+        "/llm-analyze/stream",
+        summary=_LLM_STREAM_SUMMARY,
+        description=_LLM_STREAM_DESCRIPTION,
+        response_class=EventSourceResponse,
+    )
+    async def llm_analyze_stream(
+        request: AnalysisRequest,
+        loaded: tuple[list[dict], str] = Depends(_analysis_input),
+    ):
+        """Stream LLM analysis on a dataset or hunt."""
+        # FastAPI frames each event and sends keep-alive pings, which keeps
+        # proxies from dropping the connection during a long prefill.
+        rows, ds_name = loaded
+        async for event in run_llm_analysis_stream(rows, request, dataset_name=ds_name):
+            yield event
+
+else:
+
+    @router.post(
+        "/llm-analyze/stream",
+        summary=_LLM_STREAM_SUMMARY,
+        description=_LLM_STREAM_DESCRIPTION,
+    )
+    async def llm_analyze_stream(
+        request: AnalysisRequest,
+        loaded: tuple[list[dict], str] = Depends(_analysis_input),
+    ):
+        """Stream LLM analysis on a dataset or hunt."""
+        rows, ds_name = loaded
+
+        async def _stream() -> AsyncIterator[bytes]:
+            async for event in run_llm_analysis_stream(rows, request, dataset_name=ds_name):
+                yield b"data: " + orjson.dumps(event) + b"\n\n"
+
+        return StreamingResponse(
+            _stream(),
+            media_type="text/event-stream",
+            headers={
+                "Cache-Control": "no-cache",
+                "Connection": "keep-alive",
+                "X-Accel-Buffering": "no",
+            },
+        )
+
+
+async def _load_analysis_rows(
+    request: AnalysisRequest, db: AsyncSession,
+) -> tuple[list[dict], str]:
+    """Load the rows and display name for an LLM analysis request."""
     if not request.dataset_id and not request.hunt_id:
         raise HTTPException(status_code=400, detail="Provide dataset_id or hunt_id")
 
-    # Load rows
-    rows_objs = await _fetch_rows(
+    # Load just the row data dicts (projected, streamed in batches)
+    rows = await _fetch_row_data(
         db,
         dataset_id=request.dataset_id,
         hunt_id=request.hunt_id,
         limit=2000,
     )
 
-    if not rows_objs:
+    if not rows:
         raise HTTPException(status_code=404, detail="No rows found for analysis")
 
-    # Extract data dicts
-    rows = [r.normalized_data or r.data for r in rows_objs]
-
     # Get dataset name
     ds_name = "hunt datasets"
     if request.dataset_id:
-        repo = DatasetRepository(db)
-        ds = await repo.get_dataset(request.dataset_id)
-        if ds:
-            ds_name = ds.name
+        ds_name = await _dataset_name(db, request.dataset_id) or ds_name
 
-    result = await run_llm_analysis(rows, request, dataset_name=ds_name)
-    return result
+    return rows, ds_name
+
+
+# dataset_id -> (fetched_at, name).  Datasets have no rename path, so the
+# TTL only bounds how long a deleted dataset's name lingers.
+DATASET_NAME_TTL = 300
+_dataset_names = LRUCache(maxsize=1024, ttl=DATASET_NAME_TTL)
+
+
+async def _dataset_name(db: AsyncSession, dataset_id: str) -> str | None:
+    cached = _dataset_names.get(dataset_id)
+    if cached is not None:
+        return cached
+
+    name = await db.scalar(select(Dataset.name).where(Dataset.id == dataset_id))
+    if name is not None:
+        _dataset_names.put(dataset_id, name)
+    return name
 
 
 # ── Timeline ──────────────────────────────────────────────────────────
@@ -200,13 +310,11 @@ async def llm_analyze(
     summary="Get event timeline histogram bins",
 )
 async def get_timeline(
-    dataset_id: str | None = Query(None),
-    hunt_id: str | None = Query(None),
+    scope: tuple[str | None, str | None] = Depends(require_scope),
     bins: int = Query(60, ge=10, le=200),
     db: AsyncSession = Depends(get_db),
 ):
-    if not dataset_id and not hunt_id:
-        raise HTTPException(status_code=400, detail="Provide dataset_id or hunt_id")
+    dataset_id, hunt_id = scope
     return await build_timeline_bins(db, dataset_id=dataset_id, hunt_id=hunt_id, bins=bins)
 
 
@@ -215,14 +323,12 @@ async def get_timeline(
     summary="Get per-field value distributions",
 )
 async def get_field_stats(
-    dataset_id: str | None = Query(None),
-    hunt_id: str | None = Query(None),
+    scope: tuple[str | None, str | None] = Depends(require_scope),
     fields: str | None = Query(None, description="Comma-separated field names"),
     top_n: int = Query(20, ge=5, le=100),
     db: AsyncSession = Depends(get_db),
 ):
-    if not dataset_id and not hunt_id:
-        raise HTTPException(status_code=400, detail="Provide dataset_id or hunt_id")
+    dataset_id, hunt_id = scope
     field_list = [f.strip() for f in fields.split(",")] if fields else None
     return await compute_field_stats(
         db, dataset_id=dataset_id, hunt_id=hunt_id,
@@ -272,12 +378,10 @@ async def search_dataset_rows(
     summary="Map dataset events to MITRE ATT&CK techniques",
 )
 async def get_mitre_map(
-    dataset_id: str | None = Query(None),
-    hunt_id: str | None = Query(None),
+    scope: tuple[str | None, str | None] = Depends(require_scope),
     db: AsyncSession = Depends(get_db),
 ):
-    if not dataset_id and not hunt_id:
-        raise HTTPException(status_code=400, detail="Provide dataset_id or hunt_id")
+    dataset_id, hunt_id = scope
     return await map_to_attack(db, dataset_id=dataset_id, hunt_id=hunt_id)
 
 
@@ -286,11 +390,24 @@ async def get_mitre_map(
     summary="Build entity-technique knowledge graph",
 )
 async def get_knowledge_graph(
-    dataset_id: str | None = Query(None),
-    hunt_id: str | None = Query(None),
+    scope: tuple[str | None, str | None] = Depends(require_scope),
     db: AsyncSession = Depends(get_db),
 ):
-<<<<<<< HEAD
+    dataset_id, hunt_id = scope
+    return await build_knowledge_graph(db, dataset_id=dataset_id, hunt_id=hunt_id)
+
+
+# ── Background jobs ──────────────────────────────────────────────────
+
+
+@router.post(
+    "/jobs/submit/{job_type}",
+    summary="Submit a background job",
+)
+async def submit_job(
+    job_type: str,
+    params: dict = Body(default_factory=dict, embed=True),
+):
     """Submit a new job to the queue.
 
     Job types: triage, host_profile, report, anomaly, query
@@ -306,8 +423,6 @@ async def get_knowledge_graph(
             detail=f"Invalid job_type: {job_type}. Valid: {[t.value for t in JobType]}",
         )
 
-    if not job_queue.can_accept():
-        raise HTTPException(status_code=429, detail="Job queue is busy. Retry shortly.")
     if not job_queue.can_accept():
         raise HTTPException(status_code=429, detail="Job queue is busy. Retry shortly.")
     job = job_queue.submit(jt, **params)
@@ -329,8 +444,3 @@ async def lb_health_check():
     from app.services.load_balancer import lb
     await lb.check_health()
     return lb.get_status()
-=======
-    if not dataset_id and not hunt_id:
-        raise HTTPException(status_code=400, detail="Provide dataset_id or hunt_id")
-    return await build_knowledge_graph(db, dataset_id=dataset_id, hunt_id=hunt_id)
->>>>>>> 7c454036c7ef6a3d6517f98cbee643fd0238e0b2
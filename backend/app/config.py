@@ -57,6 +57,11 @@ class AppConfig(BaseSettings):
     ROADRUNNER_OLLAMA_PORT: int = Field(
         default=11434, description="Ollama port on Roadrunner"
     )
+    OLLAMA_KEEP_ALIVE: str = Field(
+        default="1h",
+        description="How long Ollama keeps a model (and its prompt-prefix KV cache) "
+        "loaded after a request",
+    )
 
     # -- LLM Routing defaults ------------------------------------------
     DEFAULT_FAST_MODEL: str = Field(
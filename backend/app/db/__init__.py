@@ -1,9 +1,18 @@
 """Database package."""
 
-from .engine import Base, get_db, init_db, dispose_db, engine, async_session_factory
+from .engine import (
+    Base,
+    DBSessionMiddleware,
+    get_db,
+    init_db,
+    dispose_db,
+    engine,
+    async_session_factory,
+)
 
 __all__ = [
     "Base",
+    "DBSessionMiddleware",
     "get_db",
     "init_db",
     "dispose_db",
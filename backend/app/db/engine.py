@@ -3,6 +3,8 @@
 Uses async SQLAlchemy with aiosqlite for local dev and asyncpg for production PostgreSQL.
 """
 
+from contextvars import ContextVar
+
 from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
@@ -60,17 +62,59 @@ class Base(DeclarativeBase):
     pass
 
 
-async def get_db() -> AsyncSession:  # type: ignore[misc]
-    """FastAPI dependency that yields an async DB session."""
-    async with async_session_factory() as session:
-        try:
-            yield session
-            await session.commit()
-        except Exception:
-            await session.rollback()
-            raise
-        finally:
-            await session.close()
+# Session for the HTTP request being handled, set by DBSessionMiddleware
+_request_session: ContextVar[AsyncSession] = ContextVar("request_session")
+
+
+class DBSessionMiddleware:
+    """Pure ASGI middleware scoping one AsyncSession to each HTTP request.
+
+    The session is committed just before the response starts (rolled back
+    for 4xx/5xx or on an exception), so a client never sees success for a
+    write that did not land.  Sessions connect lazily, so requests that
+    never touch the database cost no connection.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async with async_session_factory() as session:
+            token = _request_session.set(session)
+
+            async def _send(message):
+                if message["type"] == "http.response.start":
+                    if message["status"] < 400:
+                        await session.commit()
+                    else:
+                        await session.rollback()
+                await send(message)
+
+            try:
+                await self.app(scope, receive, _send)
+                # Writes made while streaming a body land here
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+            finally:
+                _request_session.reset(token)
+
+
+async def get_db() -> AsyncSession:
+    """FastAPI dependency returning the request's session.
+
+    A plain context-variable lookup: DBSessionMiddleware owns the session's
+    lifecycle, so there is no per-dependency setup or teardown.
+    """
+    try:
+        return _request_session.get()
+    except LookupError:
+        raise RuntimeError("get_db() used outside DBSessionMiddleware") from None
 
 
 async def init_db() -> None:
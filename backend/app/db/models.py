@@ -18,6 +18,7 @@ from sqlalchemy import (
     Text,
     JSON,
     Index,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -454,9 +455,13 @@ class Alert(Base):
 
     __table_args__ = (
         Index("ix_alerts_severity", "severity"),
-        Index("ix_alerts_status", "status"),
-        Index("ix_alerts_hunt", "hunt_id"),
-        Index("ix_alerts_dataset", "dataset_id"),
+        # Match list_alerts' ORDER BY score DESC, created_at DESC so filtered
+        # pages are read in index order instead of sorted.  The leading
+        # status/hunt/dataset columns also serve plain lookups on them.
+        Index("ix_alerts_score_created", text("score DESC"), text("created_at DESC")),
+        Index("ix_alerts_hunt_score_created", "hunt_id", text("score DESC"), text("created_at DESC")),
+        Index("ix_alerts_dataset_score_created", "dataset_id", text("score DESC"), text("created_at DESC")),
+        Index("ix_alerts_status_score_created", "status", text("score DESC"), text("created_at DESC")),
     )
 
 
@@ -11,7 +11,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.db import init_db, dispose_db
+from app.db import DBSessionMiddleware, init_db, dispose_db
 from app.api.routes.agent_v2 import router as agent_router
 from app.api.routes.datasets import router as datasets_router
 from app.api.routes.hunts import router as hunts_router
@@ -50,6 +50,9 @@ async def lifespan(app: FastAPI):
     async with async_session_factory() as seed_db:
         await seed_defaults(seed_db)
     logger.info("AUP keyword defaults checked")
+    # One agent per process, injected into the agent routes via Depends(get_agent)
+    from app.agents.core_v2 import ThreatHuntAgent
+    app.state.agent = ThreatHuntAgent()
 <<<<<<< HEAD
 
     # Start job queue
@@ -169,6 +172,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# One DB session per request, handed to routes by get_db
+app.add_middleware(DBSessionMiddleware)
+
 # Include routes
 app.include_router(auth_router)
 app.include_router(agent_router)
@@ -0,0 +1,74 @@
+"""Small in-process caches shared by services and routes.
+
+``LRUCache`` is a bounded mapping with an optional per-entry TTL;
+``SingleFlight`` caches one async result for a few seconds and lets
+concurrent callers share the call that is already running.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class LRUCache:
+    """Bounded least-recently-used mapping; entries older than ``ttl`` miss."""
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        stored_at, value = entry
+        if self.ttl is not None and time.monotonic() - stored_at >= self.ttl:
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight:
+    """Reuse the result of ``fetch`` for ``ttl`` seconds.
+
+    Callers arriving while a fetch is running await that same fetch, and a
+    caller that is cancelled does not cancel it for the others.
+    """
+
+    def __init__(self, fetch: Callable[[], Awaitable[Any]], ttl: float):
+        self.fetch = fetch
+        self.ttl = ttl
+        self._value: tuple[float, Any] | None = None
+        self._inflight: asyncio.Future | None = None
+
+    async def get(self) -> Any:
+        cached = self._value
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+
+        inflight = self._inflight
+        if inflight is None or inflight.done():
+            inflight = self._inflight = asyncio.ensure_future(self.fetch())
+        result = await asyncio.shield(inflight)
+        self._value = (time.monotonic(), result)
+        return result
+
+    def clear(self) -> None:
+        self._value = None
@@ -206,6 +206,7 @@ async def query_dataset_stream(
             system=QUERY_SYSTEM_PROMPT,
             max_tokens=max_tokens,
             temperature=0.3,
+            chunk_max_tokens=1,  # keep token_count a true token count
         ):
             token_count += 1
             yield f"data: {json.dumps({'type': 'token', 'content': token})}\n\n"
@@ -10,7 +10,7 @@ import json
 import logging
 import time
 from collections import Counter, defaultdict
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
 from pydantic import BaseModel, Field
 
@@ -163,22 +163,12 @@ def summarize_dataset_rows(
 # ── LLM analysis engine ──────────────────────────────────────────────
 
 
-async def run_llm_analysis(
-    rows: list[dict],
+def _analysis_prompt(
+    summary: str,
     request: AnalysisRequest,
-    dataset_name: str = "unknown",
-) -> AnalysisResult:
-    """Run LLM analysis on dataset rows."""
-    start = time.monotonic()
-
-    # Build summary
-    summary = summarize_dataset_rows(rows)
-
-    # Route to appropriate model
-    task_type = TaskType.DEEP_ANALYSIS if request.mode == "deep" else TaskType.QUICK_CHAT
-    decision = task_router.route(task_type)
-
-    # Build prompt
+    dataset_name: str,
+    rag_context: str,
+) -> str:
     focus_text = FOCUS_PROMPTS.get(request.focus or "", "")
     prompt = f"""Analyze the following forensic dataset from '{dataset_name}'.
 
@@ -188,35 +178,70 @@ Analyst question: {request.question}
 
 {summary}
 """
+    if rag_context:
+        prompt = f"{prompt}\n\n{rag_context}"
+    return prompt
+
 
-    # Enrich with SANS RAG
+async def _analysis_rag_context(
+    request: AnalysisRequest, n_rows: int, dataset_name: str,
+) -> str:
+    """SANS RAG context for an analysis ("" if enrichment fails)."""
     try:
-        rag_context = await sans_rag.enrich_prompt(
+        return await sans_rag.enrich_prompt(
             request.question,
-            investigation_context=f"Analyzing {len(rows)} rows from {dataset_name}",
+            investigation_context=f"Analyzing {n_rows} rows from {dataset_name}",
         )
-        if rag_context:
-            prompt = f"{prompt}\n\n{rag_context}"
     except Exception as e:
         logger.warning(f"SANS RAG enrichment failed: {e}")
+        return ""
 
-    # Call LLM
+
+async def _build_analysis_prompt(
+    rows: list[dict],
+    request: AnalysisRequest,
+    dataset_name: str,
+) -> tuple[str, str]:
+    """Return ``(summary, prompt)`` for an analysis, enriched with SANS RAG."""
+    summary = summarize_dataset_rows(rows)
+    rag_context = await _analysis_rag_context(request, len(rows), dataset_name)
+    return summary, _analysis_prompt(summary, request, dataset_name, rag_context)
+
+
+def _route_analysis(request: AnalysisRequest):
+    task_type = TaskType.DEEP_ANALYSIS if request.mode == "deep" else TaskType.QUICK_CHAT
+    return task_router.route(task_type)
+
+
+async def _generate_analysis(decision, prompt: str) -> dict:
+    """Call the routed model for one analysis prompt (5 min hard limit)."""
     provider = task_router.get_provider(decision)
-    messages = [
-        {"role": "system", "content": ANALYSIS_SYSTEM},
-        {"role": "user", "content": prompt},
-    ]
+    return await asyncio.wait_for(
+        provider.generate(
+            prompt=prompt,
+            system=ANALYSIS_SYSTEM,
+            max_tokens=settings.AGENT_MAX_TOKENS * 2,  # longer for analysis
+            temperature=0.3,
+        ),
+        timeout=300,
+    )
+
+
+async def run_llm_analysis(
+    rows: list[dict],
+    request: AnalysisRequest,
+    dataset_name: str = "unknown",
+) -> AnalysisResult:
+    """Run LLM analysis on dataset rows."""
+    start = time.monotonic()
 
+    # Route to appropriate model
+    decision = _route_analysis(request)
+    summary, prompt = await _build_analysis_prompt(rows, request, dataset_name)
+
+    # Call LLM
     try:
-        raw = await asyncio.wait_for(
-            provider.generate(
-                prompt=prompt,
-                system=ANALYSIS_SYSTEM,
-                max_tokens=settings.AGENT_MAX_TOKENS * 2,  # longer for analysis
-                temperature=0.3,
-            ),
-            timeout=300,  # 5 min hard limit
-        )
+        raw = await _generate_analysis(decision, prompt)
     except asyncio.TimeoutError:
         logger.error("LLM analysis timed out after 300s")
         return AnalysisResult(
@@ -251,6 +276,170 @@ Analyst question: {request.question}
     return result
 
 
+async def run_llm_analysis_stream(
+    rows: list[dict],
+    request: AnalysisRequest,
+    dataset_name: str = "unknown",
+) -> AsyncIterator[dict]:
+    """Run an analysis while streaming progress as event dicts.
+
+    Yields ``status`` events, one ``token`` event per decoded chunk, then a
+    final ``done`` event carrying the parsed ``AnalysisResult`` (or an
+    ``error`` event).
+    """
+    start = time.monotonic()
+    decision = _route_analysis(request)
+
+    yield {"type": "status", "message": f"Summarizing {len(rows)} rows from {dataset_name}"}
+    summary, prompt = await _build_analysis_prompt(rows, request, dataset_name)
+
+    provider = task_router.get_provider(decision)
+    max_tokens = settings.AGENT_MAX_TOKENS * 2  # longer for analysis
+    if isinstance(provider, OllamaProvider):
+        tokens = provider.generate_stream(
+            prompt, system=ANALYSIS_SYSTEM, max_tokens=max_tokens, temperature=0.3,
+        )
+    else:
+        tokens = provider.chat_stream(
+            [
+                {"role": "system", "content": ANALYSIS_SYSTEM},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=max_tokens,
+            temperature=0.3,
+        )
+    yield {"type": "status", "message": f"Analyzing with {decision.model} on {decision.node}"}
+
+    parts: list[str] = []
+    try:
+        async with asyncio.timeout(300):  # same 5 min hard limit as run_llm_analysis
+            async for token in tokens:
+                parts.append(token)
+                yield {"type": "token", "text": token}
+    except TimeoutError:
+        logger.error("LLM analysis stream timed out after 300s")
+        yield {"type": "error", "detail": "Analysis timed out after 5 minutes. Try a smaller dataset or 'quick' mode."}
+        return
+    except Exception as e:
+        logger.error(f"LLM analysis stream failed: {e}")
+        yield {"type": "error", "detail": f"Analysis failed: {str(e)}"}
+        return
+
+    result = _parse_analysis("".join(parts))
+    result.model_used = decision.model
+    result.node_used = decision.node
+    result.latency_ms = int((time.monotonic() - start) * 1000)
+    result.rows_analyzed = len(rows)
+    result.dataset_summary = summary
+    yield {"type": "done", "result": result.model_dump()}
+
+
+# Rows per LLM call when an analysis is split across concurrent requests
+ANALYSIS_BATCH_ROWS = 500
+
+# Slices generating at once; the rest wait so one analysis cannot flood a node
+ANALYSIS_BATCH_CONCURRENCY = 4
+
+
+async def run_llm_analysis_batched(
+    rows: list[dict],
+    request: AnalysisRequest,
+    dataset_name: str = "unknown",
+    batch_rows: int = ANALYSIS_BATCH_ROWS,
+    concurrency: int = ANALYSIS_BATCH_CONCURRENCY,
+) -> AnalysisResult:
+    """Analyze rows in slices of *batch_rows*, concurrently, and merge the results.
+
+    Each slice gets its own summary (and so its own sample rows), so large
+    row sets are covered beyond the first slice, and the LLM server can
+    decode up to *concurrency* slices in parallel.  The SANS RAG context is
+    fetched once and shared by every slice.  Slices that fail or time out
+    are left out of the merge and reported in its analysis text.  Small
+    inputs take the single-call path.
+    """
+    if len(rows) <= batch_rows:
+        return await run_llm_analysis(rows, request, dataset_name=dataset_name)
+
+    start = time.monotonic()
+    decision = _route_analysis(request)
+    rag_context = await _analysis_rag_context(request, len(rows), dataset_name)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def _analyze_slice(chunk: list[dict]) -> AnalysisResult:
+        summary = summarize_dataset_rows(chunk)
+        prompt = _analysis_prompt(summary, request, dataset_name, rag_context)
+        async with sem:
+            raw = await _generate_analysis(decision, prompt)
+        result = _parse_analysis(raw)
+        result.rows_analyzed = len(chunk)
+        return result
+
+    slices = [rows[i:i + batch_rows] for i in range(0, len(rows), batch_rows)]
+    outcomes = await asyncio.gather(
+        *(_analyze_slice(chunk) for chunk in slices), return_exceptions=True,
+    )
+    parts: list[AnalysisResult | None] = []
+    for i, outcome in enumerate(outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error(f"LLM analysis slice {i + 1}/{len(slices)} failed: {outcome!r}")
+            parts.append(None)
+        else:
+            parts.append(outcome)
+
+    merged = _merge_analyses(parts, batch_rows, len(rows))
+    merged.model_used = decision.model
+    merged.node_used = decision.node
+    merged.latency_ms = int((time.monotonic() - start) * 1000)
+    merged.rows_analyzed = sum(p.rows_analyzed for p in parts if p is not None)
+    merged.dataset_summary = summarize_dataset_rows(rows)
+    return merged
+
+
+def _merge_analyses(
+    parts: list[AnalysisResult | None], batch_rows: int, total_rows: int,
+) -> AnalysisResult:
+    """Reduce per-slice results: union the lists, keep the highest risk.
+
+    ``parts[i]`` covers rows ``i * batch_rows + 1`` onward; ``None`` marks a
+    failed slice, which is skipped and listed in the analysis text.
+    """
+    ok = [(i, p) for i, p in enumerate(parts) if p is not None]
+    failed = [i for i, p in enumerate(parts) if p is None]
+    if not ok:
+        return AnalysisResult(
+            analysis=f"Analysis failed: all {len(parts)} row slices failed or timed out.",
+        )
+
+    sections = [
+        f"### Rows {i * batch_rows + 1}–{i * batch_rows + p.rows_analyzed}\n\n{p.analysis}"
+        for i, p in ok
+    ]
+    if failed:
+        ranges = ", ".join(
+            f"{i * batch_rows + 1}–{min((i + 1) * batch_rows, total_rows)}" for i in failed
+        )
+        sections.insert(0, (
+            f"**Partial analysis:** {len(failed)} of {len(parts)} row slices "
+            f"failed or timed out and are not included (rows {ranges})."
+        ))
+
+    iocs: dict[tuple, dict] = {}
+    for _, p in ok:
+        for ioc in p.iocs_identified:
+            iocs.setdefault((ioc.get("type"), ioc.get("value")), ioc)
+
+    results = [p for _, p in ok]
+    return AnalysisResult(
+        analysis="\n\n".join(sections),
+        confidence=sum(p.confidence for p in results) / len(results),
+        key_findings=list(dict.fromkeys(f for p in results for f in p.key_findings)),
+        iocs_identified=list(iocs.values()),
+        recommended_actions=list(dict.fromkeys(a for p in results for a in p.recommended_actions)),
+        mitre_techniques=list(dict.fromkeys(t for p in results for t in p.mitre_techniques)),
+        risk_score=max(p.risk_score for p in results),
+    )
+
+
 def _parse_analysis(raw) -> AnalysisResult:
     """Try to parse LLM output as JSON, fall back to plain text.
 
@@ -379,6 +379,30 @@ async def _fetch_rows(
     return result.scalars().all()
 
 
+async def _fetch_row_data(
+    db: AsyncSession,
+    dataset_id: str | None = None,
+    hunt_id: str | None = None,
+    limit: int = 50_000,
+) -> list[dict[str, Any]]:
+    """Like _fetch_rows, but return only each row's data dict.
+
+    Selects just the two JSON columns, so no DatasetRow/Dataset objects are
+    hydrated for callers that only read the row contents.  Rows are streamed
+    in batches of 500, so the full driver result is never buffered next to
+    the returned list.
+    """
+    stmt = select(DatasetRow.normalized_data, DatasetRow.data)
+    if dataset_id:
+        stmt = stmt.where(DatasetRow.dataset_id == dataset_id)
+    elif hunt_id:
+        stmt = stmt.join(Dataset).where(Dataset.hunt_id == hunt_id)
+
+    stmt = stmt.order_by(DatasetRow.row_index).limit(limit)
+    result = await db.stream(stmt.execution_options(yield_per=500))
+    return [normalized or data async for normalized, data in result.tuples()]
+
+
 def _classify_event(data: dict) -> str:
     """Classify a row as process / network / file / registry / other."""
     if _clean(data.get("pid")) or _clean(data.get("process_name")):
@@ -18,6 +18,7 @@ import httpx
 from app.config import settings
 from app.agents.providers_v2 import _get_client
 from app.agents.registry import Node
+from app.services.cache import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -122,6 +123,9 @@ class RAGResult:
     latency_ms: int = 0
 
 
+HEALTH_TTL = 5.0
+
+
 class SANSRAGService:
     """Service for querying SANS courseware via Open WebUI RAG pipeline."""
 
@@ -130,6 +134,7 @@ class SANSRAGService:
         self.api_key = settings.OPENWEBUI_API_KEY
         self.rag_model = settings.DEFAULT_FAST_MODEL
         self._available: bool | None = None
+        self._health = SingleFlight(self._probe_health, HEALTH_TTL)
 
     def _headers(self) -> dict:
         h = {"Content-Type": "application/json"}
@@ -185,7 +190,7 @@ class SANSRAGService:
         Open WebUI automatically retrieves from its indexed knowledge base
         when the model is configured with a knowledge collection.
         """
-        client = _get_client()
+        client = _get_client(self.openwebui_url)
 
         system_msg = (
             "You are a SANS cybersecurity knowledge assistant. "
@@ -318,9 +323,16 @@ class SANSRAGService:
         return "\n".join(parts) if parts else ""
 
     async def health_check(self) -> dict:
-        """Check RAG service availability."""
+        """Check RAG service availability.
+
+        Cached for ``HEALTH_TTL`` seconds, with concurrent callers sharing
+        one in-flight probe, like ``check_all_nodes``.
+        """
+        return dict(await self._health.get())
+
+    async def _probe_health(self) -> dict:
         try:
-            client = _get_client()
+            client = _get_client(self.openwebui_url)
             resp = await client.get(
                 f"{self.openwebui_url}/v1/models",
                 headers=self._headers(),
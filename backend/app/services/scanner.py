@@ -5,10 +5,12 @@ Scanning is done in Python (not SQL LIKE on JSON columns) for portability
 across SQLite / PostgreSQL and to provide per-cell match context.
 """
 
+import asyncio
 import logging
 import re
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
+from typing import Callable
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -93,6 +95,9 @@ class KeywordScanCache:
 
     def __init__(self):
         self._entries: dict[str, KeywordScanCacheEntry] = {}
+        # Bumped on every clear(); theme/keyword edits clear the cache, so
+        # other caches derived from themes can compare generations.
+        self.generation = 0
 
     def put(self, dataset_id: str, result: dict):
         self._entries[dataset_id] = KeywordScanCacheEntry(dataset_id=dataset_id, result=result)
@@ -105,6 +110,7 @@ class KeywordScanCache:
 
     def clear(self):
         self._entries.clear()
+        self.generation += 1
 
 
 keyword_scan_cache = KeywordScanCache()
@@ -125,8 +131,13 @@ class KeywordScanner:
         scan_hunts: bool = False,
         scan_annotations: bool = False,
         scan_messages: bool = False,
+        on_progress: Callable[[dict], None] | None = None,
     ) -> dict:
-        """Run a full AUP scan and return dict matching ScanResponse."""
+        """Run a full AUP scan and return dict matching ScanResponse.
+
+        ``on_progress``, if given, is called after each dataset with its id,
+        name, and the running ``rows_scanned`` / ``hits`` totals.
+        """
         # Load themes + keywords
         themes = await self._load_themes(theme_ids)
         if not themes:
@@ -140,7 +151,7 @@ class KeywordScanner:
         )
 
         # Scan dataset rows
-        await self._scan_datasets(patterns, result, dataset_ids)
+        await self._scan_datasets(patterns, result, dataset_ids, on_progress)
 
         # Scan hunts
         if scan_hunts:
@@ -228,7 +239,11 @@ class KeywordScanner:
                     ))
 
     async def _scan_datasets(
-        self, patterns: dict, result: ScanResult, dataset_ids: list[str] | None
+        self,
+        patterns: dict,
+        result: ScanResult,
+        dataset_ids: list[str] | None,
+        on_progress: Callable[[dict], None] | None = None,
     ) -> None:
         """Scan dataset rows in batches using keyset pagination (no OFFSET)."""
         ds_q = select(Dataset.id, Dataset.name)
@@ -240,8 +255,6 @@ class KeywordScanner:
         if not ds_map:
             return
 
-        import asyncio
-
         max_rows = max(0, int(settings.SCANNER_MAX_ROWS_PER_SCAN))
         budget_reached = False
 
@@ -266,32 +279,27 @@ class KeywordScanner:
                 if not rows:
                     break
 
-                for row in rows:
-                    result.rows_scanned += 1
-                    data = row.data or {}
-                    hostname, username = _infer_hostname_and_user(data)
-                    for col_name, cell_value in data.items():
-                        if cell_value is None:
-                            continue
-                        text = str(cell_value)
-                        self._match_text(
-                            text,
-                            patterns,
-                            "dataset_row",
-                            row.id,
-                            col_name,
-                            result.hits,
-                            row_index=row.row_index,
-                            dataset_name=ds_name,
-                            hostname=hostname,
-                            username=username,
-                        )
+                # Matching is pure CPU; run it off the event loop so a large
+                # scan does not stall other requests.  Only plain values cross
+                # the thread boundary, never the ORM rows or the session.
+                batch = [(row.id, row.row_index, row.data or {}) for row in rows]
+                result.hits.extend(
+                    await asyncio.to_thread(self._match_rows, batch, patterns, ds_name)
+                )
+                result.rows_scanned += len(batch)
 
                 last_id = rows[-1].id
-                await asyncio.sleep(0)
                 if len(rows) < BATCH_SIZE:
                     break
 
+            if on_progress is not None:
+                on_progress({
+                    "dataset_id": ds_id,
+                    "dataset_name": ds_name,
+                    "rows_scanned": result.rows_scanned,
+                    "hits": len(result.hits),
+                })
+
             if budget_reached:
                 break
 
@@ -301,6 +309,33 @@ class KeywordScanner:
                 result.rows_scanned,
             )
 
+    def _match_rows(
+        self,
+        batch: list[tuple[int, int | None, dict]],
+        patterns: dict,
+        dataset_name: str,
+    ) -> list[ScanHit]:
+        """Match a batch of ``(row_id, row_index, data)`` rows; returns hits."""
+        hits: list[ScanHit] = []
+        for row_id, row_index, data in batch:
+            hostname, username = _infer_hostname_and_user(data)
+            for col_name, cell_value in data.items():
+                if cell_value is None:
+                    continue
+                self._match_text(
+                    str(cell_value),
+                    patterns,
+                    "dataset_row",
+                    row_id,
+                    col_name,
+                    hits,
+                    row_index=row_index,
+                    dataset_name=dataset_name,
+                    hostname=hostname,
+                    username=username,
+                )
+        return hits
+
     async def _scan_hunts(self, patterns: dict, result: ScanResult) -> None:
         """Scan hunt names and descriptions."""
         hunts_result = await self.db.execute(select(Hunt))
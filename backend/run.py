@@ -1,5 +1,6 @@
 """Entry point for backend server."""
 
+import importlib.util
 import logging
 import uvicorn
 
@@ -14,4 +15,6 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=False,
+        # uvloop is pinned for Linux/macOS in requirements.txt; Windows has none.
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
     )
\ No newline at end of file
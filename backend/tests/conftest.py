@@ -20,6 +20,7 @@ from sqlalchemy.orm import sessionmaker
 os.environ["TH_DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
 os.environ["TH_JWT_SECRET"] = "test-secret-key-for-tests"
 
+from app.agents.core_v2 import ThreatHuntAgent
 from app.db.engine import Base, get_db
 from app.main import app
 
@@ -66,6 +67,9 @@ async def client(db_session) -> AsyncGenerator[AsyncClient, None]:
         yield db_session
 
     app.dependency_overrides[get_db] = _override_get_db
+    # ASGITransport skips the lifespan, so install the agent it would build
+    if not hasattr(app.state, "agent"):
+        app.state.agent = ThreatHuntAgent()
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -0,0 +1,615 @@
+"""Tests for the analyst-assist agent core (prompting, parsing, caches)."""
+
+import asyncio
+import inspect
+
+import httpx
+import orjson
+import pytest
+import pytest_asyncio
+
+from app.agents.core_v2 import AgentContext, SemanticRAGCache, ThreatHuntAgent
+from app.agents import providers_v2
+from app.agents.providers_v2 import (
+    EmbeddingProvider,
+    OllamaProvider,
+    OpenWebUIProvider,
+    _aiter_byte_lines,
+    _coalesce_tokens,
+)
+from app.agents.registry import Node
+from app.agents.router import RoutingDecision, TaskRouter, TaskType
+from app.config import settings
+from app.services.cache import SingleFlight
+
+
+class _FakeEmbedder:
+    """Maps known texts to fixed vectors; counts calls."""
+
+    def __init__(self, vectors: dict[str, list[float]]):
+        self.vectors = vectors
+        self.calls = 0
+
+    async def embed(self, text: str) -> list[float]:
+        self.calls += 1
+        return self.vectors[text]
+
+
+class TestSemanticRAGCache:
+    """Tests for the semantic SANS RAG cache."""
+
+    @pytest.mark.asyncio
+    async def test_similar_query_hits(self):
+        cache = SemanticRAGCache(embedder=_FakeEmbedder({
+            "a": [1.0, 0.0, 0.0],
+            "a'": [0.99, 0.05, 0.0],
+        }))
+        vec = await cache.embed("a")
+        cache.store(vec, "SANS context")
+        assert cache.lookup(await cache.embed("a'")) == "SANS context"
+
+    @pytest.mark.asyncio
+    async def test_dissimilar_query_misses(self):
+        cache = SemanticRAGCache(embedder=_FakeEmbedder({
+            "a": [1.0, 0.0],
+            "b": [0.0, 1.0],
+        }))
+        cache.store(await cache.embed("a"), "SANS context")
+        assert cache.lookup(await cache.embed("b")) is None
+
+    @pytest.mark.asyncio
+    async def test_bounded_size(self):
+        cache = SemanticRAGCache(
+            embedder=_FakeEmbedder({"a": [1.0, 0.0]}), max_entries=2,
+        )
+        vec = await cache.embed("a")
+        for i in range(5):
+            cache.store(vec, f"ctx{i}")
+        assert len(cache) == 2
+
+    @pytest.mark.asyncio
+    async def test_vectors_stored_as_int8(self):
+        cache = SemanticRAGCache(embedder=_FakeEmbedder({"a": [0.6, -0.8]}))
+        vec = await cache.embed("a")
+        cache.store(vec, "ctx")
+        assert cache._vectors[0].typecode == "b"
+        assert cache.lookup(vec) == "ctx"
+
+    @pytest.mark.asyncio
+    async def test_embed_failure_returns_none(self):
+        class _Broken:
+            async def embed(self, text):
+                raise RuntimeError("node down")
+
+        cache = SemanticRAGCache(embedder=_Broken())
+        assert await cache.embed("anything") is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_enrichments_coalesce(self, monkeypatch):
+        from app.agents import core_v2
+
+        calls = 0
+
+        async def _enrich(query, investigation_context=""):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "SANS context"
+
+        class _NoEmbed:
+            async def embed(self, text):
+                return []
+
+        monkeypatch.setattr(core_v2.sans_rag, "enrich_prompt", _enrich)
+        agent = ThreatHuntAgent(rag_cache=SemanticRAGCache(embedder=_NoEmbed()))
+        ctx = AgentContext(query="lateral movement via psexec")
+        results = await asyncio.gather(*[agent._get_rag_context(ctx) for _ in range(5)])
+        assert results == ["SANS context"] * 5
+        assert calls == 1
+        assert not agent._inflight
+
+    @pytest.mark.asyncio
+    async def test_fetch_hit_skips_retrieval(self, monkeypatch):
+        from app.agents import core_v2
+
+        async def _enrich(query, investigation_context=""):
+            raise AssertionError("retrieval should be skipped on a hit")
+
+        monkeypatch.setattr(core_v2.sans_rag, "enrich_prompt", _enrich)
+        cache = SemanticRAGCache(embedder=_FakeEmbedder({"psexec\n": [1.0, 0.0]}))
+        cache.store(await cache.embed("psexec\n"), "cached SANS context")
+        agent = ThreatHuntAgent(rag_cache=cache)
+        assert await agent._fetch_rag_context(AgentContext(query="psexec")) == "cached SANS context"
+
+    @pytest.mark.asyncio
+    async def test_fetch_miss_retrieves_and_stores(self, monkeypatch):
+        from app.agents import core_v2
+
+        async def _enrich(query, investigation_context=""):
+            return "fresh SANS context"
+
+        monkeypatch.setattr(core_v2.sans_rag, "enrich_prompt", _enrich)
+        cache = SemanticRAGCache(embedder=_FakeEmbedder({
+            "wmi\n": [1.0, 0.0],
+            "psexec\n": [0.0, 1.0],
+        }))
+        cache.store(await cache.embed("wmi\n"), "other context")
+        agent = ThreatHuntAgent(rag_cache=cache)
+        assert await agent._fetch_rag_context(AgentContext(query="psexec")) == "fresh SANS context"
+        assert len(cache) == 2
+        assert cache.lookup(await cache.embed("psexec\n")) == "fresh SANS context"
+
+    @pytest.mark.asyncio
+    async def test_empty_cache_embeds_alongside_retrieval(self, monkeypatch):
+        from app.agents import core_v2
+
+        embed_done = False
+
+        class _SlowEmbed:
+            async def embed(self, text):
+                nonlocal embed_done
+                await asyncio.sleep(0.05)
+                embed_done = True
+                return [1.0, 0.0]
+
+        async def _enrich(query, investigation_context=""):
+            # Retrieval is not held back behind the embedding round trip
+            assert not embed_done
+            return "SANS context"
+
+        monkeypatch.setattr(core_v2.sans_rag, "enrich_prompt", _enrich)
+        cache = SemanticRAGCache(embedder=_SlowEmbed())
+        agent = ThreatHuntAgent(rag_cache=cache)
+        assert await agent._fetch_rag_context(AgentContext(query="psexec")) == "SANS context"
+        assert len(cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_embed_timeout_falls_back_to_retrieval(self, monkeypatch):
+        from app.agents import core_v2
+
+        async def _enrich(query, investigation_context=""):
+            return "SANS context"
+
+        class _HungEmbed:
+            async def embed(self, text):
+                await asyncio.sleep(10)
+
+        monkeypatch.setattr(core_v2.sans_rag, "enrich_prompt", _enrich)
+        cache = SemanticRAGCache(embedder=_HungEmbed(), embed_timeout=0.05)
+        cache.store([1.0, 0.0], "unrelated")
+        agent = ThreatHuntAgent(rag_cache=cache)
+        result = await asyncio.wait_for(
+            agent._fetch_rag_context(AgentContext(query="psexec")), timeout=1,
+        )
+        assert result == "SANS context"
+        assert len(cache) == 1
+
+
+class _FakeProvider:
+    """Records calls; blocks perspectives until all three have started."""
+
+    def __init__(self, router: "_FakeRouter", model: str):
+        self.router = router
+        self.model = model
+
+    async def generate(self, prompt, system="", max_tokens=0, temperature=0.0):
+        self.router.prompts.append(prompt)
+        if self.model == "judge":
+            return {"response": '{"guidance": "merged", "confidence": 0.8}'}
+        self.router.started += 1
+        if self.router.started == 3:
+            self.router.all_started.set()
+        await asyncio.wait_for(self.router.all_started.wait(), timeout=1)
+        return {"response": f"{self.model} view", "_latency_ms": 5}
+
+    async def is_available(self) -> bool:
+        return True
+
+
+class _FakeRouter(TaskRouter):
+    def __init__(self):
+        super().__init__()
+        self.prompts: list[str] = []
+        self.started = 0
+        self.all_started = asyncio.Event()
+
+    def route(self, task_type, model_override=None):
+        model = "judge" if task_type == TaskType.DEBATE_JUDGE else task_type.value
+        return RoutingDecision(
+            model=model, node=Node.WILE, task_type=task_type,
+            provider_type="ollama", reason="test",
+        )
+
+    def get_provider(self, decision):
+        return _FakeProvider(self, decision.model)
+
+
+class TestDebate:
+    """Tests for debate mode orchestration."""
+
+    @pytest.mark.asyncio
+    async def test_perspectives_run_concurrently(self):
+        router = _FakeRouter()
+        agent = ThreatHuntAgent(router=router)
+        response = await agent.assist(
+            AgentContext(query="suspicious lsass access", mode="debate")
+        )
+        assert response.guidance == "merged"
+        assert response.model_used == "judge"
+        judge_prompt = router.prompts[-1]
+        assert judge_prompt.count("suspicious lsass access") == 1
+        assert "Analyst query:" not in judge_prompt
+        assert "=== Critic (via debate_critic) ===" in judge_prompt
+        assert [p.role for p in response.perspectives] == [
+            "Planner", "Critic", "Pragmatist",
+        ]
+
+
+class TestAssist:
+    """Tests for single-model assist generation."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_assists_call_generate_directly(self, monkeypatch):
+        router = _FakeRouter()
+        prompts = []
+
+        class _Provider:
+            async def generate(self, prompt, **kwargs):
+                prompts.append(prompt)
+                return {"response": "{}"}
+
+        router.get_provider = lambda decision: _Provider()
+        agent = ThreatHuntAgent(router=router)
+
+        async def _no_rag(context):
+            return ""
+
+        monkeypatch.setattr(agent, "_get_rag_context", _no_rag)
+        queries = ["q1", "q2", "q2"]
+        await asyncio.gather(*[agent.assist(AgentContext(query=q)) for q in queries])
+        assert len(prompts) == 3
+
+
+class TestParseJson:
+    """Tests for JSON extraction from LLM output."""
+
+    def setup_method(self):
+        self.agent = ThreatHuntAgent()
+
+    def test_plain_json(self):
+        assert self.agent._try_parse_json('{"guidance": "x"}') == {"guidance": "x"}
+
+    def test_fenced_json(self):
+        text = 'Here you go:\n```json\n{"guidance": "x", "confidence": 0.5}\n```\nDone.'
+        assert self.agent._try_parse_json(text)["confidence"] == 0.5
+
+    def test_embedded_object_with_braces_in_strings(self):
+        text = 'Answer: {"guidance": "use {curly} and \\"quotes\\"", "n": {"a": 1}} trailing }'
+        parsed = self.agent._try_parse_json(text)
+        assert parsed["guidance"] == 'use {curly} and "quotes"'
+        assert parsed["n"] == {"a": 1}
+
+    def test_non_object_rejected(self):
+        assert self.agent._try_parse_json("[1, 2]") is None
+        assert self.agent._try_parse_json("no json here {") is None
+
+    def test_parse_response_coerces_fields(self):
+        raw = (
+            '{"guidance": "g", "confidence": 3, "suggested_pivots": ["a", 2, "c", "d", "e", "f", "g"],'
+            ' "suggested_filters": "not a list", "sans_references": ["FOR508"]}'
+        )
+        response = self.agent._parse_response(raw, AgentContext(query="q"))
+        assert response.confidence == 1.0
+        assert response.suggested_pivots == ["a", "2", "c", "d", "e", "f"]
+        assert response.suggested_filters == []
+        assert response.caveats is None
+        assert response.model_dump()["sans_references"] == ["FOR508"]
+
+
+class TestBuildPrompt:
+    """Tests for prompt assembly."""
+
+    def test_includes_present_fields_in_order(self):
+        prompt = ThreatHuntAgent()._build_prompt(AgentContext(
+            query="q",
+            host_identifier="WS-01",
+            dataset_name="proc.csv",
+            active_hypotheses=["h1", "h2"],
+            conversation_history=[{"role": "user", "content": "hi"}],
+        ))
+        assert prompt.splitlines() == [
+            "Analyst query: q",
+            "Dataset: proc.csv",
+            "Host: WS-01",
+            "Active hypotheses: h1; h2",
+            "",
+            "Recent conversation:",
+            "  user: hi",
+        ]
+
+    def test_query_only(self):
+        assert ThreatHuntAgent()._build_prompt(AgentContext(query="q")) == "Analyst query: q"
+
+    def test_history_trimmed_on_construction(self):
+        history = [{"role": "user", "content": "x" * 800}] * (settings.AGENT_HISTORY_LENGTH + 5)
+        ctx = AgentContext(query="q", conversation_history=history)
+        assert len(ctx.conversation_history) == settings.AGENT_HISTORY_LENGTH
+        assert all(len(m["content"]) == 500 for m in ctx.conversation_history)
+
+
+class TestBatchGenerate:
+    """Tests for bounded provider fan-out."""
+
+    @pytest.mark.asyncio
+    async def test_preserves_order_and_bounds_concurrency(self):
+        provider = OpenWebUIProvider(model="m")
+        active = peak = 0
+
+        async def _generate(prompt, **kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return {"response": prompt.upper()}
+
+        provider.generate = _generate
+        results = await providers_v2.batch_generate(
+            provider, ["a", "b", "c", "d", "e"], concurrency=2,
+        )
+        assert [r["response"] for r in results] == ["A", "B", "C", "D", "E"]
+        assert peak == 2
+
+
+@pytest_asyncio.fixture
+async def mock_clients(monkeypatch):
+    """Serve a node's pooled client from an httpx handler; closed afterwards."""
+    clients: list[httpx.AsyncClient] = []
+
+    def _install(base_url: str, handler) -> None:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        clients.append(client)
+        monkeypatch.setitem(providers_v2._clients, base_url, client)
+
+    yield _install
+    for client in clients:
+        await client.aclose()
+
+
+class TestProviderRequests:
+    """Tests for provider payloads, hedging and node health."""
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_hedged_on_mirror(self, mock_clients):
+        async def _slow(request):
+            await asyncio.sleep(1)
+            return httpx.Response(200, json={"response": "slow"})
+
+        def _fast(request):
+            return httpx.Response(200, json={"response": "fast"})
+
+        mock_clients(settings.roadrunner_url, _slow)
+        mock_clients(settings.wile_url, _fast)
+        provider = OllamaProvider(
+            "m", Node.ROADRUNNER, mirror_node=Node.WILE, hedge_after_ms=20,
+        )
+        result = await asyncio.wait_for(provider.generate("hi"), timeout=0.5)
+        assert result["response"] == "fast"
+        assert result["_node"] == "wile"
+
+    @pytest.mark.asyncio
+    async def test_hedge_delay_follows_measured_p95(self, monkeypatch, mock_clients):
+        async def _slow(request):
+            await asyncio.sleep(0.2)
+            return httpx.Response(200, json={"response": "slow"})
+
+        def _fast(request):
+            return httpx.Response(200, json={"response": "fast"})
+
+        mock_clients(settings.roadrunner_url, _slow)
+        mock_clients(settings.wile_url, _fast)
+        latency = providers_v2._LatencyWindow(min_samples=5)
+        monkeypatch.setattr(providers_v2, "_generate_latency", latency)
+        provider = OllamaProvider("m", Node.ROADRUNNER, mirror_node=Node.WILE)
+
+        # Unmeasured model: no timing hedge, the slow primary answers.
+        assert (await provider.generate("hi"))["response"] == "slow"
+
+        for _ in range(5):
+            latency.record("m", 10)
+        result = await asyncio.wait_for(provider.generate("hi"), timeout=0.15)
+        assert result["_node"] == "wile"
+
+    @pytest.mark.asyncio
+    async def test_failed_primary_fails_over_immediately(self, mock_clients):
+        def _error(request):
+            return httpx.Response(503, text="loading")
+
+        def _ok(request):
+            return httpx.Response(200, json={"response": "ok"})
+
+        mock_clients(settings.roadrunner_url, _error)
+        mock_clients(settings.wile_url, _ok)
+        provider = OllamaProvider(
+            "m", Node.ROADRUNNER, mirror_node=Node.WILE, hedge_after_ms=10_000,
+        )
+        result = await asyncio.wait_for(provider.generate("hi"), timeout=0.5)
+        assert result["response"] == "ok"
+
+    @pytest.mark.asyncio
+    async def test_generate_payload_built_from_skeleton(self, mock_clients):
+        bodies = []
+
+        def _handler(request):
+            bodies.append(orjson.loads(request.content))
+            return httpx.Response(200, json={"response": "ok"})
+
+        mock_clients(settings.wile_url, _handler)
+        provider = OllamaProvider("m", Node.WILE)
+        await provider.generate("a")
+        await provider.generate("b", system="sys", max_tokens=64)
+        assert "system" not in bodies[0]
+        assert bodies[1]["system"] == "sys"
+        assert bodies[1]["options"] == {"num_predict": 64, "temperature": 0.3}
+        assert all(b["model"] == "m" and "keep_alive" in b for b in bodies)
+        assert "prompt" not in provider._payload_skel
+
+    @pytest.mark.asyncio
+    async def test_node_health_single_flight_and_ttl(self, monkeypatch):
+        probes = 0
+
+        async def _probe():
+            nonlocal probes
+            probes += 1
+            await asyncio.sleep(0.01)
+            return {"wile": {"available": True}}
+
+        monkeypatch.setattr(
+            providers_v2, "_node_health",
+            SingleFlight(_probe, providers_v2.NODE_HEALTH_TTL),
+        )
+        results = await asyncio.gather(*[providers_v2.check_all_nodes() for _ in range(5)])
+        assert probes == 1
+        assert all(r == {"wile": {"available": True}} for r in results)
+        results[0]["wile"]["available"] = False
+        assert (await providers_v2.check_all_nodes())["wile"]["available"] is True
+        assert probes == 1
+
+    def test_heavy_debate_override_gets_mirror(self):
+        decision = TaskRouter().route(TaskType.DEBATE_PLANNER)
+        assert decision.mirror_node is not None
+        assert decision.mirror_node != decision.node
+
+
+class TestEmbeddingCoalescing:
+    """Tests for micro-batched embedding requests."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_embeds_share_one_request(self):
+        provider = EmbeddingProvider(model="m", max_batch=8)
+        batches: list[list[str]] = []
+
+        async def _embed_many(texts):
+            batches.append(texts)
+            return [[float(len(t))] for t in texts]
+
+        provider._embed_many = _embed_many
+        texts = [f"t{'x' * i}" for i in range(10)]
+        vecs = await asyncio.gather(*[provider.embed(t) for t in texts])
+        assert vecs == [[float(len(t))] for t in texts]
+        assert [len(b) for b in batches] == [8, 2]
+
+    @pytest.mark.asyncio
+    async def test_embed_batch_chunks_by_max_batch(self):
+        provider = EmbeddingProvider(model="m", max_batch=3)
+        sizes: list[int] = []
+
+        async def _embed_many(texts):
+            sizes.append(len(texts))
+            return [[1.0]] * len(texts)
+
+        provider._embed_many = _embed_many
+        assert len(await provider.embed_batch(["a"] * 7)) == 7
+        assert sorted(sizes) == [1, 3, 3]
+
+    @pytest.mark.asyncio
+    async def test_embed_batch_preserves_order_across_workers(self):
+        provider = EmbeddingProvider(model="m", max_batch=2)
+
+        async def _embed_many(texts):
+            await asyncio.sleep(0.001 * (10 - len(texts[0])))
+            return [[float(len(t))] for t in texts]
+
+        provider._embed_many = _embed_many
+        texts = ["x" * i for i in range(1, 10)]
+        vecs = await provider.embed_batch(texts, concurrency=3)
+        assert vecs == [[float(i)] for i in range(1, 10)]
+
+
+class TestStreamCoalescing:
+    """Tests for token stream re-chunking."""
+
+    def test_stream_pipeline_is_natively_async(self):
+        # A sync generator anywhere in the chain would be iterated in a
+        # threadpool by Starlette/FastAPI, costing a thread hop per frame.
+        for fn in (
+            ThreatHuntAgent.assist_stream,
+            OllamaProvider.generate_stream,
+            OpenWebUIProvider.chat_stream,
+            _coalesce_tokens,
+            _aiter_byte_lines,
+        ):
+            assert inspect.isasyncgenfunction(fn), fn.__qualname__
+
+    @pytest.mark.asyncio
+    async def test_assist_stream_forwards_chunking(self):
+        provider = OllamaProvider("m", Node.ROADRUNNER)
+        seen = {}
+
+        async def _generate_stream(prompt, **kwargs):
+            seen.update(kwargs)
+            yield "chunk"
+
+        provider.generate_stream = _generate_stream
+
+        class _Router(TaskRouter):
+            def get_provider(self, decision):
+                return provider
+
+        agent = ThreatHuntAgent(router=_Router())
+        chunks = [
+            c async for c in agent.assist_stream(
+                AgentContext(query="hi"), chunk_window_ms=20, chunk_max_tokens=8,
+            )
+        ]
+        assert chunks == ["chunk"]
+        assert seen["chunk_window_ms"] == 20
+        assert seen["chunk_max_tokens"] == 8
+
+    @pytest.mark.asyncio
+    async def test_does_not_read_ahead_of_consumer(self):
+        # Backpressure: a slow SSE client must stall the upstream decode
+        # rather than let tokens pile up in memory.
+        produced = 0
+
+        async def _tokens():
+            nonlocal produced
+            for i in range(1000):
+                produced += 1
+                yield str(i)
+
+        chunks = _coalesce_tokens(_tokens(), window_ms=1000, max_tokens=4)
+        assert await chunks.__anext__() == "0123"
+        await asyncio.sleep(0.01)
+        assert produced <= 5
+        await chunks.aclose()
+
+    @pytest.mark.asyncio
+    async def test_flushes_on_size_and_at_end(self):
+        async def _tokens():
+            for t in "abcdefg":
+                yield t
+
+        chunks = [c async for c in _coalesce_tokens(_tokens(), 1000, 3)]
+        assert chunks == ["abc", "def", "g"]
+
+    @pytest.mark.asyncio
+    async def test_flushes_when_upstream_idles(self):
+        async def _tokens():
+            yield "a"
+            yield "b"
+            await asyncio.sleep(0.2)
+            yield "c"
+
+        chunks = [c async for c in _coalesce_tokens(_tokens(), 20, 16)]
+        assert chunks == ["ab", "c"]
+
+    @pytest.mark.asyncio
+    async def test_byte_lines_split_across_chunks(self):
+        class _Resp:
+            async def aiter_bytes(self):
+                for part in (b'{"a": 1}\n{"b"', b': 2}\r\n\n', b'data: [DONE]'):
+                    yield part
+
+        lines = [line async for line in _aiter_byte_lines(_Resp())]
+        assert lines == [b'{"a": 1}', b'{"b": 2}', b"data: [DONE]"]
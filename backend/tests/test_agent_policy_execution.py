@@ -1,8 +1,12 @@
 ﻿"""Tests for execution-mode behavior in /api/agent/assist."""
 
 import io
+import json
 
 import pytest
+from sqlalchemy import func, select
+
+from app.db.models import Conversation, Message
 
 
 @pytest.mark.asyncio
@@ -122,3 +126,115 @@ async def test_agent_assist_execution_preference_force_executes(client):
     body = q.json()
     assert body["model_used"] == "execution:keyword_scanner"
     assert body["execution"] is not None
+
+
+@pytest.mark.asyncio
+async def test_policy_scan_stream_reports_progress_then_result(client):
+    h = await client.post("/api/hunts", json={"name": "Stream Exec Hunt"})
+    assert h.status_code == 200
+    hunt_id = h.json()["id"]
+
+    csv_bytes = (
+        b"User,visited_url,title,ClientId,Fqdn\n"
+        b"Alice,https://www.pornhub.com/view_video.php,site,HOST-A,host-a.local\n"
+    )
+    files = {"file": ("web_history.csv", io.BytesIO(csv_bytes), "text/csv")}
+    up = await client.post(f"/api/datasets/upload?hunt_id={hunt_id}", files=files)
+    assert up.status_code == 200
+
+    t = await client.post(
+        "/api/keywords/themes",
+        json={"name": "Adult Content", "color": "#e91e63", "enabled": True},
+    )
+    assert t.status_code in (201, 409)
+    themes = await client.get("/api/keywords/themes")
+    adult = next(x for x in themes.json()["themes"] if x["name"] == "Adult Content")
+    await client.post(
+        f"/api/keywords/themes/{adult['id']}/keywords",
+        json={"value": "pornhub", "is_regex": False},
+    )
+
+    res = await client.post(
+        "/api/agent/assist/policy-scan/stream",
+        json={"query": "Summarize notable activity.", "hunt_id": hunt_id},
+    )
+    assert res.status_code == 200
+    frames = [
+        line[len("data: "):]
+        for line in res.text.splitlines()
+        if line.startswith("data: ")
+    ]
+    assert frames[-1] == "[DONE]"
+    events = [json.loads(f) for f in frames[:-1]]
+    types = [e["type"] for e in events]
+    assert types[0] == "scan_started"
+    assert "dataset_scanned" in types
+    assert types[-1] == "result"
+    assert events[-1]["response"]["model_used"] == "execution:keyword_scanner"
+    # The scan ran on the request's (test) session, so it saw the upload.
+    assert events[-1]["response"]["execution"]["policy_hits"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_policy_scan_stream_error_is_generic(client, monkeypatch):
+    from app.api.routes import agent_v2
+
+    async def _fail(request, db, on_progress=None):
+        raise RuntimeError("SELECT secret FROM datasets WHERE id = 'x'")
+
+    monkeypatch.setattr(agent_v2, "_run_policy_domain_execution", _fail)
+    res = await client.post(
+        "/api/agent/assist/policy-scan/stream",
+        json={"query": "Summarize notable activity."},
+    )
+    assert res.status_code == 200
+    assert "SELECT" not in res.text
+    frames = [
+        line[len("data: "):]
+        for line in res.text.splitlines()
+        if line.startswith("data: ")
+    ]
+    assert json.loads(frames[0]) == {"type": "error", "detail": "Policy scan failed"}
+
+
+@pytest.mark.asyncio
+async def test_assist_persists_conversation_before_responding(client, db_session):
+    from app.agents.core_v2 import AgentResponse
+    from app.api.routes.agent_v2 import get_agent
+    from app.main import app
+
+    class _Agent:
+        async def assist(self, context):
+            return AgentResponse(guidance="look at lsass", confidence=0.8)
+
+    app.dependency_overrides[get_agent] = lambda: _Agent()
+    h = await client.post("/api/hunts", json={"name": "Persist Hunt"})
+    hunt_id = h.json()["id"]
+
+    payload = {
+        "query": "What stands out in this hunt?",
+        "hunt_id": hunt_id,
+        "execution_preference": "off",
+    }
+    first = await client.post("/api/agent/assist", json=payload)
+    assert first.status_code == 200
+    conv_id = first.json()["conversation_id"]
+    assert conv_id
+
+    conv = await db_session.get(Conversation, conv_id)
+    assert conv is not None and conv.hunt_id == hunt_id
+    roles = (await db_session.scalars(
+        select(Message.role).where(Message.conversation_id == conv_id)
+    )).all()
+    assert sorted(roles) == ["agent", "user"]
+
+    # A follow-up naming the returned id lands in the same conversation.
+    follow = await client.post(
+        "/api/agent/assist", json={**payload, "conversation_id": conv_id},
+    )
+    assert follow.status_code == 200
+    assert follow.json()["conversation_id"] == conv_id
+    count = await db_session.scalar(
+        select(func.count()).select_from(Message).where(Message.conversation_id == conv_id)
+    )
+    assert count == 4
@@ -17,31 +17,38 @@ class TestModelRegistry:
         assert len(WILE_MODELS) > 0
 
     def test_find_by_capability(self):
-        chat_models = registry.find(capability=Capability.CHAT)
+        chat_models = list(registry.find(capability=Capability.CHAT))
         assert len(chat_models) > 0
         for m in chat_models:
             assert Capability.CHAT in m.capabilities
 
     def test_find_code_models(self):
-        code_models = registry.find(capability=Capability.CODE)
+        code_models = list(registry.find(capability=Capability.CODE))
         assert len(code_models) > 0
 
     def test_find_vision_models(self):
-        vision_models = registry.find(capability=Capability.VISION)
+        vision_models = list(registry.find(capability=Capability.VISION))
         assert len(vision_models) > 0
 
     def test_find_embedding_models(self):
-        embed_models = registry.find(capability=Capability.EMBEDDING)
+        embed_models = list(registry.find(capability=Capability.EMBEDDING))
         assert len(embed_models) > 0
 
     def test_find_by_node(self):
-        wile_models = registry.find(node=Node.WILE)
-        rr_models = registry.find(node=Node.ROADRUNNER)
+        wile_models = list(registry.find(node=Node.WILE))
+        rr_models = list(registry.find(node=Node.ROADRUNNER))
         assert len(wile_models) > 0
         assert len(rr_models) > 0
 
+    def test_find_is_lazy_and_combines_filters(self):
+        found = registry.find(capability=Capability.CODE, node=Node.WILE)
+        assert not isinstance(found, list)
+        names = [m.name for m in found]
+        assert "qwen2.5-coder:32b" in names
+        assert all(m.node == Node.WILE for m in registry.find(node=Node.WILE, tier=Tier.FAST))
+
     def test_find_heavy_models(self):
-        heavy = registry.find(tier=Tier.HEAVY)
+        heavy = list(registry.find(tier=Tier.HEAVY))
         assert len(heavy) > 0
         for m in heavy:
             assert m.tier == Tier.HEAVY
@@ -56,12 +63,25 @@ class TestModelRegistry:
         assert best is not None
         assert Capability.VISION in best.capabilities
 
+    def test_get_by_name(self):
+        entry = registry.get_by_name("qwen2:72b-instruct")
+        assert entry is not None
+        assert entry.node == Node.WILE
+        assert registry.get_by_name("nonexistent-model:99b") is None
+
     def test_to_dict(self):
         result = registry.to_dict()
         assert isinstance(result, list)
         assert len(result) > 0
         assert "name" in result[0]
         assert "capabilities" in result[0]
+        assert isinstance(result[0]["capabilities"], list)
+
+    def test_entries_are_hashable(self):
+        entry = registry.models[0]
+        assert hash(entry) == hash(registry.get_by_name(entry.name))
+        assert {entry: True}[entry] is True
+        assert len(set(registry.models)) == len(registry.models)
 
 
 class TestTaskRouter:
@@ -97,6 +117,36 @@ class TestTaskRouter:
         assert decision.node == Node.CLUSTER
         assert decision.provider_type == "openwebui"
 
+    def test_route_decisions_cached(self):
+        router = TaskRouter()
+        decision = router.route(TaskType.DEEP_ANALYSIS)
+        assert router.route(TaskType.DEEP_ANALYSIS) is decision
+        router.invalidate_route_cache()
+        assert router.route(TaskType.DEEP_ANALYSIS) is not decision
+
+    def test_only_registry_overrides_are_cached(self):
+        router = TaskRouter()
+        for i in range(50):
+            router.route(TaskType.QUICK_CHAT, model_override=f"made-up-{i}:1b")
+        assert not router._route_cache
+        known = router.route(TaskType.QUICK_CHAT, model_override="llama3.1:latest")
+        assert router.route(TaskType.QUICK_CHAT, model_override="llama3.1:latest") is known
+
+    def test_get_provider_reuses_instances(self):
+        router = TaskRouter()
+        decision = router.route(TaskType.QUICK_CHAT)
+        provider = router.get_provider(decision)
+        assert router.get_provider(decision) is provider
+        router.invalidate_provider_cache()
+        assert router.get_provider(decision) is not provider
+
+    def test_provider_cache_is_bounded(self):
+        router = TaskRouter()
+        for i in range(router.PROVIDER_CACHE_MAX + 10):
+            decision = router.route(TaskType.QUICK_CHAT, model_override=f"made-up-{i}:1b")
+            router.get_provider(decision)
+        assert len(router._providers) == router.PROVIDER_CACHE_MAX
+
     def test_classify_code_task(self):
         assert task_router.classify_task("deobfuscate this powershell script") == TaskType.CODE_ANALYSIS
         assert task_router.classify_task("decode this base64 payload") == TaskType.CODE_ANALYSIS
@@ -104,6 +154,9 @@ class TestTaskRouter:
     def test_classify_deep_task(self):
         assert task_router.classify_task("detailed forensic analysis of this process tree") == TaskType.DEEP_ANALYSIS
 
+    def test_classify_code_beats_deep(self):
+        assert task_router.classify_task("detailed review of this powershell") == TaskType.CODE_ANALYSIS
+
     def test_classify_vision_task(self):
         assert task_router.classify_task("analyze this screenshot", has_image=True) == TaskType.VISION
 
@@ -0,0 +1,190 @@
+"""Tests for the alerts API and its bulk-load helpers."""
+
+import pytest
+
+from app.api.routes import alerts
+from app.db.models import Alert, _new_id
+
+
+class _FakeCopyConnection:
+    """Stands in for the asyncpg connection behind an AsyncSession."""
+
+    def __init__(self):
+        self.driver_connection = self
+        self.copies: list[tuple[str, list[tuple], list[str]]] = []
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.copies.append((table, records, columns))
+
+    async def get_raw_connection(self):
+        return self
+
+
+class _FakeCopySession:
+    def __init__(self):
+        self.raw = _FakeCopyConnection()
+
+    async def connection(self):
+        return self.raw
+
+
+class TestCopyAlerts:
+    """Tests for the PostgreSQL COPY bulk-load path."""
+
+    @pytest.mark.asyncio
+    async def test_synthesized_dicts_match_alert_to_dict(self, db_session):
+        row = {
+            "id": _new_id(),
+            "title": "Encoded PowerShell",
+            "description": None,
+            "severity": "high",
+            "analyzer": "suspicious_commands",
+            "score": 80.0,
+            "evidence": [{"row_index": 1}],
+            "mitre_technique": "T1059.001",
+            "tags": None,
+            "hunt_id": None,
+            "dataset_id": None,
+        }
+        db = _FakeCopySession()
+        created = await alerts._copy_alerts(db, [row])
+
+        # The same row inserted through the ORM serializes to the same keys
+        alert = Alert(**row)
+        db_session.add(alert)
+        await db_session.flush()
+        expected = alerts._alert_to_dict(alert)
+        assert set(created[0]) == set(expected)
+        assert created[0]["tags"] == expected["tags"] == []
+        assert created[0]["status"] == expected["status"] == "new"
+
+        table, records, columns = db.raw.copies[0]
+        assert table == Alert.__tablename__
+        assert set(columns) <= set(Alert.__table__.columns.keys())
+        copied = dict(zip(columns, records[0]))
+        assert copied["evidence"] == '[{"row_index":1}]'
+        assert copied["tags"] is None
+
+
+async def _seed(db_session, hunt_id: str, *specs: dict) -> list[str]:
+    ids = []
+    for spec in specs:
+        alert = Alert(
+            id=_new_id(),
+            title=spec.get("title", "alert"),
+            analyzer=spec.get("analyzer", "suspicious_commands"),
+            hunt_id=hunt_id,
+            **{k: v for k, v in spec.items() if k not in ("title", "analyzer")},
+        )
+        db_session.add(alert)
+        ids.append(alert.id)
+    await db_session.flush()
+    return ids
+
+
+class TestAlertRoutes:
+    """Tests for alert listing, statistics and updates."""
+
+    @pytest.mark.asyncio
+    async def test_list_total_from_window_and_past_the_end(self, client, db_session):
+        hunt_id = _new_id()
+        ids = await _seed(db_session, hunt_id, {"score": 10}, {"score": 90}, {"score": 50})
+
+        res = await client.get("/api/alerts", params={"hunt_id": hunt_id, "limit": 2})
+        assert res.status_code == 200
+        body = res.json()
+        assert body["total"] == 3
+        assert [a["id"] for a in body["alerts"]] == [ids[1], ids[2]]
+
+        res = await client.get("/api/alerts", params={"hunt_id": hunt_id, "offset": 5})
+        assert res.json() == {"alerts": [], "total": 3}
+
+        res = await client.get("/api/alerts", params={"hunt_id": _new_id()})
+        assert res.json() == {"alerts": [], "total": 0}
+
+    @pytest.mark.asyncio
+    async def test_streamed_list_matches_buffered(self, client, db_session):
+        hunt_id = _new_id()
+        await _seed(db_session, hunt_id, {"score": 1, "tags": ["x"]}, {"score": 2})
+
+        params = {"hunt_id": hunt_id, "limit": 10}
+        buffered = (await client.get("/api/alerts", params=params)).json()
+        streamed = await client.get("/api/alerts", params={**params, "stream": "true"})
+        assert streamed.status_code == 200
+        assert streamed.json() == buffered
+
+        empty = await client.get(
+            "/api/alerts", params={"hunt_id": hunt_id, "offset": 5, "stream": "true"},
+        )
+        assert empty.json() == {"alerts": [], "total": 0}
+
+    @pytest.mark.asyncio
+    async def test_stats_counts_each_dimension(self, client, db_session):
+        hunt_id = _new_id()
+        await _seed(
+            db_session, hunt_id,
+            {"severity": "high", "status": "new", "mitre_technique": "T1059"},
+            {"severity": "high", "status": "resolved", "mitre_technique": "T1059"},
+            {"severity": "low", "status": "new", "analyzer": "beaconing"},
+        )
+
+        res = await client.get("/api/alerts/stats", params={"hunt_id": hunt_id})
+        assert res.status_code == 200
+        body = res.json()
+        assert body["total"] == 3
+        assert body["severity_counts"] == {"high": 2, "low": 1}
+        assert body["status_counts"] == {"new": 2, "resolved": 1}
+        assert body["analyzer_counts"] == {"suspicious_commands": 2, "beaconing": 1}
+        assert body["top_mitre"] == [{"technique": "T1059", "count": 2}]
+
+    @pytest.mark.asyncio
+    async def test_update_stamps_first_transition_only(self, client, db_session):
+        (alert_id,) = await _seed(db_session, _new_id(), {})
+
+        first = await client.put(f"/api/alerts/{alert_id}", json={"status": "acknowledged"})
+        assert first.status_code == 200
+        acked_at = first.json()["acknowledged_at"]
+        assert acked_at is not None
+        assert first.json()["status"] == "acknowledged"
+
+        again = await client.put(f"/api/alerts/{alert_id}", json={"status": "acknowledged"})
+        assert again.json()["acknowledged_at"] == acked_at
+
+        resolved = await client.put(f"/api/alerts/{alert_id}", json={"status": "resolved"})
+        assert resolved.json()["resolved_at"] is not None
+        assert resolved.json()["acknowledged_at"] == acked_at
+
+        unchanged = await client.put(f"/api/alerts/{alert_id}", json={})
+        assert unchanged.json()["status"] == "resolved"
+
+        missing = await client.put(f"/api/alerts/{_new_id()}", json={"status": "resolved"})
+        assert missing.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_delete_returns_404_once_gone(self, client, db_session):
+        (alert_id,) = await _seed(db_session, _new_id(), {})
+
+        res = await client.delete(f"/api/alerts/{alert_id}")
+        assert res.status_code == 200
+        assert res.json() == {"ok": True}
+        assert (await client.delete(f"/api/alerts/{alert_id}")).status_code == 404
+        assert (await client.get(f"/api/alerts/{alert_id}")).status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_bulk_update_counts_and_keeps_existing_stamps(self, client, db_session):
+        hunt_id = _new_id()
+        ids = await _seed(db_session, hunt_id, {}, {}, {})
+        first = await client.put(f"/api/alerts/{ids[0]}", json={"status": "resolved"})
+        resolved_at = first.json()["resolved_at"]
+
+        res = await client.post(
+            "/api/alerts/bulk-update", params={"status": "resolved"}, json=ids[:2],
+        )
+        assert res.status_code == 200
+        assert res.json() == {"updated": 2}
+
+        after = [(await client.get(f"/api/alerts/{i}")).json() for i in ids]
+        assert [a["status"] for a in after] == ["resolved", "resolved", "new"]
+        assert after[0]["resolved_at"] == resolved_at
+        assert after[1]["resolved_at"] is not None
+        assert after[2]["resolved_at"] is None
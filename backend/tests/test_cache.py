@@ -0,0 +1,68 @@
+"""Tests for the shared in-process cache helpers."""
+
+import asyncio
+
+import pytest
+
+from app.services.cache import LRUCache, SingleFlight
+
+
+class TestLRUCache:
+    """Tests for the bounded LRU/TTL mapping."""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert len(cache) == 2
+
+    def test_expired_entries_miss(self, monkeypatch):
+        now = 100.0
+        monkeypatch.setattr("app.services.cache.time.monotonic", lambda: now)
+        cache = LRUCache(maxsize=4, ttl=10)
+        cache.put("a", 1)
+        now = 109.0
+        assert cache.get("a") == 1
+        now = 111.0
+        assert cache.get("a", "gone") == "gone"
+        assert len(cache) == 0
+
+
+class TestSingleFlight:
+    """Tests for the shared, briefly cached async fetch."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_fetch(self):
+        calls = 0
+
+        async def _fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        flight = SingleFlight(_fetch, ttl=60)
+        assert await asyncio.gather(*[flight.get() for _ in range(5)]) == [1] * 5
+        assert await flight.get() == 1
+        flight.clear()
+        assert await flight.get() == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_fetch(self):
+        release = asyncio.Event()
+
+        async def _fetch():
+            await release.wait()
+            return "ok"
+
+        flight = SingleFlight(_fetch, ttl=60)
+        first = asyncio.ensure_future(flight.get())
+        second = asyncio.ensure_future(flight.get())
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        assert await second == "ok"
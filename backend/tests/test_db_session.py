@@ -0,0 +1,107 @@
+"""Tests for the request-scoped session managed by DBSessionMiddleware."""
+
+import importlib
+
+import pytest
+import pytest_asyncio
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import Column, MetaData, String, Table, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.engine import DBSessionMiddleware, get_db
+
+# ``app.db`` re-exports an ``engine`` object that shadows the module name
+db_engine = importlib.import_module("app.db.engine")
+
+_metadata = MetaData()
+_notes = Table("notes", _metadata, Column("body", String, primary_key=True))
+
+
+def _build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(DBSessionMiddleware)
+
+    @app.post("/ok")
+    async def ok(db: AsyncSession = Depends(get_db)):
+        await db.execute(insert(_notes).values(body="ok"))
+        return {"ok": True}
+
+    @app.post("/raise")
+    async def raise_(db: AsyncSession = Depends(get_db)):
+        await db.execute(insert(_notes).values(body="raise"))
+        raise HTTPException(status_code=409, detail="conflict")
+
+    @app.post("/return-4xx")
+    async def return_4xx(db: AsyncSession = Depends(get_db)):
+        await db.execute(insert(_notes).values(body="4xx"))
+        return JSONResponse({"detail": "bad"}, status_code=422)
+
+    @app.post("/stream")
+    async def stream(db: AsyncSession = Depends(get_db)):
+        async def _body():
+            yield b"["
+            await db.execute(insert(_notes).values(body="stream"))
+            yield b"]"
+
+        return StreamingResponse(_body(), media_type="application/json")
+
+    return app
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path, monkeypatch):
+    # A file database: every NullPool connection must see the same data.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'mw.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(_metadata.create_all)
+    factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(db_engine, "async_session_factory", factory)
+    yield factory
+    await engine.dispose()
+
+
+async def _bodies(factory) -> list[str]:
+    async with factory() as db:
+        return list((await db.scalars(select(_notes.c.body))).all())
+
+
+@pytest.mark.asyncio
+async def test_commits_on_success(session_factory):
+    transport = ASGITransport(app=_build_app())
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.post("/ok")).status_code == 200
+    assert await _bodies(session_factory) == ["ok"]
+
+
+@pytest.mark.asyncio
+async def test_rolls_back_on_http_exception(session_factory):
+    transport = ASGITransport(app=_build_app())
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.post("/raise")).status_code == 409
+    assert await _bodies(session_factory) == []
+
+
+@pytest.mark.asyncio
+async def test_rolls_back_on_returned_error_response(session_factory):
+    transport = ASGITransport(app=_build_app())
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.post("/return-4xx")).status_code == 422
+    assert await _bodies(session_factory) == []
+
+
+@pytest.mark.asyncio
+async def test_commits_writes_made_while_streaming(session_factory):
+    transport = ASGITransport(app=_build_app())
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        res = await ac.post("/stream")
+    assert res.status_code == 200
+    assert res.content == b"[]"
+    assert await _bodies(session_factory) == ["stream"]
+
+
+@pytest.mark.asyncio
+async def test_get_db_outside_middleware_raises():
+    with pytest.raises(RuntimeError):
+        await get_db()
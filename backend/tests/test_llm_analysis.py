@@ -0,0 +1,169 @@
+"""Tests for LLM dataset analysis (slicing, merging)."""
+
+import asyncio
+
+import orjson
+import pytest
+
+from app.services import llm_analysis
+from app.services.llm_analysis import AnalysisRequest, AnalysisResult, _merge_analyses
+
+
+def _part(n_rows: int, **kwargs) -> AnalysisResult:
+    return AnalysisResult(analysis=f"{n_rows} rows", rows_analyzed=n_rows, **kwargs)
+
+
+class TestMergeAnalyses:
+    """Tests for reducing per-slice analysis results."""
+
+    def test_unions_lists_and_keeps_highest_risk(self):
+        merged = _merge_analyses(
+            [
+                _part(
+                    10, confidence=0.6, risk_score=40,
+                    key_findings=["a", "b"], mitre_techniques=["T1059"],
+                    iocs_identified=[{"type": "ip", "value": "1.2.3.4", "context": "first"}],
+                ),
+                _part(
+                    4, confidence=0.8, risk_score=75,
+                    key_findings=["b", "c"], mitre_techniques=["T1059", "T1071"],
+                    iocs_identified=[{"type": "ip", "value": "1.2.3.4", "context": "again"}],
+                ),
+            ],
+            batch_rows=10,
+            total_rows=14,
+        )
+        assert merged.key_findings == ["a", "b", "c"]
+        assert merged.mitre_techniques == ["T1059", "T1071"]
+        assert merged.iocs_identified == [{"type": "ip", "value": "1.2.3.4", "context": "first"}]
+        assert merged.risk_score == 75
+        assert merged.confidence == pytest.approx(0.7)
+        assert "### Rows 1–10" in merged.analysis
+        assert "### Rows 11–14" in merged.analysis
+        assert "Partial" not in merged.analysis
+
+    def test_failed_slices_are_skipped_and_reported(self):
+        merged = _merge_analyses(
+            [_part(10, confidence=0.9, risk_score=20), None, None],
+            batch_rows=10,
+            total_rows=25,
+        )
+        assert merged.confidence == pytest.approx(0.9)
+        assert "2 of 3 row slices" in merged.analysis
+        assert "rows 11–20, 21–25" in merged.analysis
+        assert "### Rows 1–10" in merged.analysis
+
+    def test_all_slices_failed(self):
+        merged = _merge_analyses([None, None], batch_rows=10, total_rows=20)
+        assert merged.analysis.startswith("Analysis failed")
+        assert merged.risk_score == 0
+
+
+class TestBatchedAnalysis:
+    """Tests for concurrent sliced analysis."""
+
+    @pytest.mark.asyncio
+    async def test_shares_rag_bounds_concurrency_and_drops_failures(self, monkeypatch):
+        rag_calls = 0
+        prompts: list[str] = []
+        active = peak = 0
+
+        async def _enrich(query, investigation_context=""):
+            nonlocal rag_calls
+            rag_calls += 1
+            return "SANS CONTEXT"
+
+        class _Provider:
+            async def generate(self, prompt, **kwargs):
+                nonlocal active, peak
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+                prompts.append(prompt)
+                if "idx=5" in prompt:
+                    raise RuntimeError("node went away")
+                return {"response": orjson.dumps({"analysis": "ok", "risk_score": 10}).decode()}
+
+        monkeypatch.setattr(llm_analysis.sans_rag, "enrich_prompt", _enrich)
+        monkeypatch.setattr(llm_analysis.task_router, "get_provider", lambda d: _Provider())
+
+        # 12 rows in slices of 2: the slice holding idx=5 fails
+        rows = [{"idx": i} for i in range(12)]
+        result = await llm_analysis.run_llm_analysis_batched(
+            rows, AnalysisRequest(mode="quick"), batch_rows=2, concurrency=2,
+        )
+        assert rag_calls == 1
+        assert len(prompts) == 6
+        assert all("SANS CONTEXT" in p for p in prompts)
+        assert peak == 2
+        assert result.rows_analyzed == 10
+        assert "1 of 6 row slices" in result.analysis
+        assert "rows 5–6" in result.analysis
+        assert result.risk_score == 10
+
+
+class _StreamingProvider:
+    """Non-Ollama provider double: chat_stream yields fixed chunks."""
+
+    async def chat_stream(self, messages, **kwargs):
+        for chunk in ('{"analysis": "beacon', 'ing found", ', '"risk_score": 80}'):
+            yield chunk
+
+
+class TestStreamedAnalysis:
+    """Tests for the streamed analysis event sequence."""
+
+    @pytest.mark.asyncio
+    async def test_status_token_done_sequence(self, monkeypatch):
+        async def _enrich(query, investigation_context=""):
+            return ""
+
+        monkeypatch.setattr(llm_analysis.sans_rag, "enrich_prompt", _enrich)
+        monkeypatch.setattr(llm_analysis.task_router, "get_provider", lambda d: _StreamingProvider())
+
+        events = [
+            e async for e in llm_analysis.run_llm_analysis_stream(
+                [{"a": 1}, {"a": 2}], AnalysisRequest(mode="quick"), dataset_name="ds",
+            )
+        ]
+        types = [e["type"] for e in events]
+        assert types == ["status", "status", "token", "token", "token", "done"]
+        assert "".join(e["text"] for e in events if e["type"] == "token").startswith('{"analysis"')
+        done = events[-1]["result"]
+        assert done["analysis"] == "beaconing found"
+        assert done["risk_score"] == 80
+        assert done["rows_analyzed"] == 2
+
+    @pytest.mark.asyncio
+    async def test_route_streams_sse_events(self, client, monkeypatch):
+        from app.api.routes import analysis
+
+        async def _rows(request, db):
+            return [{"a": 1}], "ds"
+
+        async def _enrich(query, investigation_context=""):
+            return ""
+
+        monkeypatch.setattr(analysis, "_load_analysis_rows", _rows)
+        monkeypatch.setattr(llm_analysis.sans_rag, "enrich_prompt", _enrich)
+        monkeypatch.setattr(llm_analysis.task_router, "get_provider", lambda d: _StreamingProvider())
+
+        res = await client.post(
+            "/api/analysis/llm-analyze/stream", json={"dataset_id": "d1", "mode": "quick"},
+        )
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("text/event-stream")
+        events = [
+            orjson.loads(line[len("data: "):])
+            for line in res.text.splitlines()
+            if line.startswith("data: ")
+        ]
+        assert [e["type"] for e in events][:2] == ["status", "status"]
+        assert events[-1]["type"] == "done"
+        assert events[-1]["result"]["risk_score"] == 80
+
+    @pytest.mark.asyncio
+    async def test_route_rejects_missing_scope_before_streaming(self, client):
+        res = await client.post("/api/analysis/llm-analyze/stream", json={})
+        assert res.status_code == 400